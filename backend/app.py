@@ -1,50 +1,53 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import sqlite3
 import os
+import json
 from datetime import datetime
-from news_analyzer import NewsAnalyzer
+from settings import create_analyzer
+from job_queue import JobQueue, QueueFullError
+from database import init_db, get_connection, query_history, get_history_entry, HistoryWriter
 
 app = Flask(__name__)
-CORS(app)
-
-analyzer = NewsAnalyzer()
-
-def init_db():
-    conn = sqlite3.connect('hoax_detection.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS analysis_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            news_text TEXT NOT NULL,
-            prediction TEXT NOT NULL,
-            confidence REAL NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+CORS(app, expose_headers=['X-Next-Cursor'])
+
+# A spawned job worker re-imports the script that started it as __mp_main__
+# and builds its own analyzer in _worker_main, so nothing is constructed there
+if __name__ != '__mp_main__':
+    # Schema first: the history writer and the job workers both write to it
+    init_db()
+
+    analyzer = create_analyzer()
+
+    job_queue = JobQueue(
+        workers=int(os.environ.get('JOB_WORKERS', '2')),
+        default_timeout=float(os.environ.get('JOB_TIMEOUT', '120')),
+        max_pending=int(os.environ.get('JOB_MAX_PENDING', '1000'))
+    )
+
+    history_writer = HistoryWriter(
+        batch_size=int(os.environ.get('HISTORY_BATCH_SIZE', '100')),
+        max_wait=float(os.environ.get('HISTORY_MAX_WAIT_MS', '50')) / 1000.0
+    )
+
+    # Models load in the background as soon as the app is imported, under any
+    # server; only the debug reloader's watcher process, which never serves, skips it
+    if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        analyzer.warm_up()
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze_news():
     try:
         data = request.get_json()
         news_text = data.get('text', '')
+        refresh = refresh_requested(data)
         
         if not news_text:
             return jsonify({'error': 'No text provided'}), 400
         
-        result = analyzer.analyze(news_text)
+        result = analyzer.analyze(news_text, refresh=refresh)
         
         # Store in database
-        conn = sqlite3.connect('hoax_detection.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO analysis_history (news_text, prediction, confidence)
-            VALUES (?, ?, ?)
-        ''', (news_text, result['prediction'], result['confidence']))
-        conn.commit()
-        conn.close()
+        save_analysis(news_text, result)
         
         return jsonify(result)
     
@@ -54,35 +57,203 @@ def analyze_news():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/analyze/stream', methods=['GET', 'POST'])
+def analyze_news_stream():
+    # Server-Sent Events: one event per finished stage, then the combined result
+    data = request.get_json(silent=True) or {}
+    news_text = data.get('text') or request.args.get('text', '')
+    refresh = refresh_requested(data)
+    
+    if not news_text:
+        return jsonify({'error': 'No text provided'}), 400
+    
+    def generate():
+        try:
+            for event, payload in analyzer.analyze_stream(news_text, refresh=refresh):
+                if event == 'result':
+                    save_analysis(news_text, payload)
+                yield sse_event(event, payload)
+        except Exception as e:
+            print(f"Error in analyze_news_stream: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            yield sse_event('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_news_batch():
+    # Accepts {"texts": [...], "verify": false} or a JSONL body with one text
+    # (or {"text": ...} object) per line; answers with one JSON line per text
+    verify = request.args.get('verify') == '1'
+    chunk_size = request.args.get('chunk_size', 32)
+    try:
+        # Bounded so one request can't buffer the whole stream in a single chunk
+        chunk_size = min(max(int(chunk_size), 1), 256)
+    except ValueError:
+        return jsonify({'error': 'chunk_size must be an integer'}), 400
+
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        texts = iter_jsonl_texts(request.stream)
+    else:
+        data = request.get_json(silent=True) or {}
+        texts = data.get('texts')
+        verify = verify or explicit_true(data.get('verify', False))
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'No texts provided'}), 400
+        invalid = next((i for i, text in enumerate(texts) if not isinstance(text, str)), None)
+        if invalid is not None:
+            return jsonify({'error': f'texts[{invalid}] must be a string'}), 400
+
+    def generate():
+        try:
+            for index, text, result, duplicate_of in analyzer.analyze_batch(texts, verify=verify, chunk_size=chunk_size):
+                line = {'index': index, **result}
+                if duplicate_of is not None:
+                    line['duplicate_of'] = duplicate_of
+                # Only full analyses go to the history, like /api/analyze
+                if verify and result.get('prediction') != 'ERROR':
+                    save_analysis(text, result)
+                yield json.dumps(line) + '\n'
+        except Exception as e:
+            print(f"Error in analyze_news_batch: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            yield json.dumps({'error': str(e)}) + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def iter_jsonl_texts(stream):
+    # A line that doesn't parse becomes a per-item error instead of ending the stream
+    for raw in stream:
+        try:
+            line = raw.decode('utf-8').strip()
+            if not line:
+                continue
+            item = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON line: {str(e)}')
+            continue
+        yield item.get('text', '') if isinstance(item, dict) else item
+
+def explicit_true(value):
+    # bool("false") is True, so only explicit true values count
+    if isinstance(value, str):
+        value = value.lower() in ('1', 'true')
+    return value is True
+
+def refresh_requested(data):
+    # Only explicit true values skip the result cache
+    return explicit_true(data.get('refresh', False)) or request.args.get('refresh') == '1'
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def save_analysis(news_text, result):
+    # Written in the background and group-committed with other requests
+    history_writer.add(news_text, result['prediction'], result['confidence'], result)
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json(silent=True) or {}
+    news_text = data.get('text', '')
+    
+    if not news_text:
+        return jsonify({'error': 'No text provided'}), 400
+    
+    try:
+        job_id = job_queue.submit(
+            news_text,
+            priority=int(data.get('priority', 0)),
+            timeout=data.get('timeout')
+        )
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid job parameters: {str(e)}'}), 400
+    
+    return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
+    # Newest first; pass the X-Next-Cursor header of a page as ?cursor= to get the next one
     try:
-        conn = sqlite3.connect('hoax_detection.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, SUBSTR(news_text, 1, 100) as preview, prediction, confidence, timestamp 
-            FROM analysis_history 
-            ORDER BY timestamp DESC 
-            LIMIT 20
-        ''')
-        history = cursor.fetchall()
-        conn.close()
-        
-        return jsonify([{
-            'id': row[0],
-            'preview': row[1],
-            'prediction': row[2],
-            'confidence': row[3],
-            'timestamp': row[4]
-        } for row in history])
-    
+        with get_connection() as conn:
+            history, next_cursor = query_history(
+                conn,
+                limit=min(max(request.args.get('limit', 20, type=int), 1), 100),
+                cursor=request.args.get('cursor'),
+                prediction=request.args.get('prediction'),
+                min_confidence=request.args.get('min_confidence', type=float),
+                max_confidence=request.args.get('max_confidence', type=float),
+                search=request.args.get('q')
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    response = jsonify([{
+        'id': row[0],
+        'preview': row[1],
+        'prediction': row[2],
+        'confidence': row[3],
+        'timestamp': row[4]
+    } for row in history])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@app.route('/api/history/<int:entry_id>', methods=['GET'])
+def get_history_entry_detail(entry_id):
+    # Full stored result of a past analysis, without recomputing it
+    with get_connection() as conn:
+        entry = get_history_entry(conn, entry_id)
+    if entry is None:
+        return jsonify({'error': 'History entry not found'}), 404
+    return jsonify(entry)
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    return jsonify({
+        'micro_batching': analyzer.hf_scheduler.stats() if analyzer.hf_scheduler else None,
+        'ensemble': analyzer.hf_detector.stats(),
+        'result_cache': analyzer.result_cache.stats() if analyzer.result_cache else None,
+        'cascade': analyzer.cascade.stats() if analyzer.cascade else None,
+        'http': analyzer.real_time_checker.http.stats(),
+        'search_cache': analyzer.real_time_checker.search_cache.stats() if analyzer.real_time_checker.search_cache else None,
+        'article_cache': analyzer.news_explainer.article_cache.stats() if analyzer.news_explainer.article_cache else None,
+        'jobs': job_queue.stats(),
+        'history_writer': history_writer.stats()
+    })
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    # Unlike /api/health, only succeeds once models are loaded and warmed up
+    report = analyzer.readiness.report()
+    return jsonify(report), 200 if report['ready'] else 503
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy'})
 
 if __name__ == '__main__':
-    init_db()
+    # Only the serving process runs job workers, not the debug reloader's watcher
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_queue.start()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
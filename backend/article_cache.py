@@ -0,0 +1,131 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_DB_PATH = 'cache.db'
+
+
+class ArticleCache:
+    """Size-bounded cache of extracted article text with HTTP validators for revalidation"""
+
+    def __init__(self, db_path: str = CACHE_DB_PATH, max_bytes: int = 32 * 1024 * 1024, fresh_for: float = 300,
+                 touch_interval: float = 60):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        # Within fresh_for seconds of the last fetch, entries are served without a request
+        self.fresh_for = fresh_for
+        # Reads only write accessed_at back when it is older than this; LRU
+        # eviction does not need it to the second
+        self.touch_interval = touch_interval
+
+        self._lock = threading.Lock()
+        self._stats = {'fresh_hits': 0, 'revalidated': 0, 'fetched': 0, 'evicted': 0}
+
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        # Readers don't wait on writers in WAL mode; it sticks to the file, so
+        # the other caches in cache.db get it too
+        conn.execute('PRAGMA journal_mode=WAL')
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS article_cache (
+                url TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_article_cache_accessed_at ON article_cache (accessed_at)')
+        conn.commit()
+        conn.close()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT content, etag, last_modified, fetched_at, accessed_at FROM article_cache WHERE url = ?', (url,)
+            )
+            row = cursor.fetchone()
+            now = time.time()
+            if row and now - row[4] >= self.touch_interval:
+                cursor.execute('UPDATE article_cache SET accessed_at = ? WHERE url = ?', (now, url))
+                conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Error reading article cache: {str(e)}")
+            return None
+
+        if not row:
+            return None
+        return {'content': row[0], 'etag': row[1], 'last_modified': row[2], 'fetched_at': row[3]}
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry['fetched_at'] < self.fresh_for
+
+    def conditional_headers(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url: str, content: str, etag: str = None, last_modified: str = None):
+        now = time.time()
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO article_cache (url, content, etag, last_modified, size, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (url, content, etag, last_modified, len(content.encode('utf-8')), now, now))
+
+            # Keep the most recently used articles that fit in max_bytes
+            cursor.execute('''
+                DELETE FROM article_cache WHERE url IN (
+                    SELECT url FROM (
+                        SELECT url, SUM(size) OVER (ORDER BY accessed_at DESC, url) AS running_size
+                        FROM article_cache
+                    ) WHERE running_size > ?
+                )
+            ''', (self.max_bytes,))
+            evicted = cursor.rowcount
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Error writing article cache: {str(e)}")
+            return
+
+        with self._lock:
+            self._stats['fetched'] += 1
+            self._stats['evicted'] += max(evicted, 0)
+
+    def mark_revalidated(self, url: str):
+        # A 304 means the stored text is still current, so restart its freshness window
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            cursor.execute('UPDATE article_cache SET fetched_at = ? WHERE url = ?', (time.time(), url))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Error updating article cache: {str(e)}")
+
+        with self._lock:
+            self._stats['revalidated'] += 1
+
+    def record_fresh_hit(self):
+        with self._lock:
+            self._stats['fresh_hits'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,129 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any
+
+
+class _PendingRequest:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatchScheduler:
+    """Collects concurrent ensemble requests into shared batched forward passes"""
+
+    def __init__(self, detector, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.detector = detector
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        self._batches = 0
+        self._requests = 0
+        self._max_batch_seen = 0
+        self._batch_sizes = {}
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        request = _PendingRequest(text)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, text: str, timeout: float = None) -> Dict[str, Any]:
+        return self.submit(text).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "requests": self._requests,
+                "queued": self._queue.qsize(),
+                "avg_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "max_batch_seen": self._max_batch_seen,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_wait_ms": self._total_wait / self._requests * 1000.0 if self._requests else 0.0,
+                "max_queue_wait_ms": self._max_wait_seen * 1000.0
+            }
+
+    def _running(self):
+        return self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive()
+
+    def _ensure_worker(self):
+        if self._running():
+            return
+        with self._lock:
+            if not self._running():
+                # After fork the parent's queue may hold its requests, so start clean
+                if self._worker_pid not in (None, os.getpid()):
+                    self._queue = queue.Queue()
+                self._worker_pid = os.getpid()
+                self._worker = threading.Thread(target=self._run, name="hf-micro-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window has closed, but take whatever already piled up
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            self._record(batch, started)
+
+            try:
+                results = self.detector.predict_ensemble_batch(
+                    [request.text for request in batch],
+                    batch_size=self.max_batch_size
+                )
+            except Exception as e:
+                logging.error(f"Error in micro-batch of {len(batch)}: {str(e)}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+    def _record(self, batch, started):
+        with self._lock:
+            size = len(batch)
+            self._batches += 1
+            self._requests += size
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            for request in batch:
+                wait = started - request.enqueued_at
+                self._total_wait += wait
+                self._max_wait_seen = max(self._max_wait_seen, wait)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import time
+
+from huggingface_detector import HuggingFaceDetector
+
+SAMPLE_TEXTS = [
+    "BREAKING: Scientists Discover Miracle Cure That Doctors Don't Want You to Know!",
+    "The Federal Reserve announced a 0.25% interest rate increase following today's meeting.",
+    "SHOCKING: This One Weird Trick Will Make You Rich Overnight!",
+    "Local authorities report a 15% decrease in traffic accidents after implementing new safety measures.",
+    "Pemerintah mengumumkan kenaikan harga BBM mulai pekan depan setelah rapat kabinet terbatas di Istana Negara. "
+    "Menteri Keuangan menjelaskan bahwa subsidi energi tahun ini telah melampaui pagu anggaran dan perlu disesuaikan.",
+    "VIRAL! Pesan berantai menyebutkan bahwa minum air garam setiap pagi dapat menyembuhkan semua penyakit. "
+    "Sebarkan ke seluruh keluarga dan teman Anda sebelum pesan ini dihapus!",
+]
+
+
+def build_corpus(count):
+    # Mix short and long texts so the length bucketing has something to do
+    corpus = []
+    for i in range(count):
+        text = SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]
+        corpus.append(" ".join([text] * (1 + i % 4)))
+    return corpus
+
+
+def run_loop(detector, texts):
+    start = time.perf_counter()
+    results = [detector.predict(text) for text in texts]
+    return results, time.perf_counter() - start
+
+
+def run_batched(detector, texts, batch_size, max_tokens):
+    start = time.perf_counter()
+    results = detector.batch_predict(texts, batch_size=batch_size, max_tokens=max_tokens)
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-text predict() with batched batch_predict()")
+    parser.add_argument("--model", default="jy46604790/Fake-News-Bert-Detect")
+    parser.add_argument("--count", type=int, default=64, help="Number of texts to score")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=8192)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    detector = HuggingFaceDetector(args.model)
+    texts = build_corpus(args.count)
+
+    # Warm up both paths so one-off allocation does not skew the numbers
+    detector.predict(texts[0])
+    detector.batch_predict(texts[:2])
+
+    loop_results, loop_time = run_loop(detector, texts)
+    batch_results, batch_time = run_batched(detector, texts, args.batch_size, args.max_tokens)
+
+    mismatches = sum(
+        1 for a, b in zip(loop_results, batch_results)
+        if a["prediction"] != b["prediction"] or abs(a["confidence"] - b["confidence"]) > 1e-3
+    )
+
+    print(f"Model: {args.model}")
+    print(f"Texts: {len(texts)} (batch_size={args.batch_size}, max_tokens={args.max_tokens})")
+    print(f"Loop predict():  {loop_time:.2f}s ({len(texts) / loop_time:.1f} texts/s)")
+    print(f"batch_predict(): {batch_time:.2f}s ({len(texts) / batch_time:.1f} texts/s)")
+    print(f"Speedup: {loop_time / batch_time:.2f}x")
+    print(f"Mismatched results: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import re
+import time
+from urllib.parse import quote
+
+from html_parsing import HTML_PARSER
+from news_explainer import NewsExplainer
+from real_time_checker import RealTimeNewsChecker
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'html')
+
+# Fixture files are named <kind>__<name>.html, where <name> is the source or
+# fact-checker name for search pages and free-form for article pages
+
+
+def safe_name(name):
+    return re.sub(r'[^\w-]', '_', name)
+
+
+def fixture_path(fixtures_dir, kind, name):
+    return os.path.join(fixtures_dir, f"{kind}__{safe_name(name)}.html")
+
+
+def save_fixtures(checker, fixtures_dir, query):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    sources = checker.trusted_sources['indonesia'] + checker.trusted_sources['international']
+
+    for kind, sites in (('search', sources), ('factcheck', checker.fact_checkers)):
+        for site in sites:
+            url = site['search_url'].format(quote(query))
+            try:
+                response = checker.http.get(url, timeout=10)
+            except Exception as e:
+                print(f"Skipping {site['name']}: {str(e)}")
+                continue
+            if response.status_code != 200:
+                print(f"Skipping {site['name']}: HTTP {response.status_code}")
+                continue
+
+            with open(fixture_path(fixtures_dir, kind, site['name']), 'wb') as f:
+                f.write(response.content)
+            print(f"Saved {kind} page for {site['name']}")
+
+            # Keep one article page per news source as well
+            if kind == 'search':
+                articles = checker.parse_search_results(site, response.content, max_results=1)
+                if articles:
+                    try:
+                        article = checker.http.get(articles[0]['link'], timeout=10)
+                        if article.status_code == 200:
+                            with open(fixture_path(fixtures_dir, 'article', site['name']), 'wb') as f:
+                                f.write(article.content)
+                            print(f"Saved article page from {site['name']}")
+                    except Exception as e:
+                        print(f"Skipping article from {site['name']}: {str(e)}")
+
+
+def load_fixtures(fixtures_dir):
+    fixtures = []
+    for filename in sorted(os.listdir(fixtures_dir)):
+        if not filename.endswith('.html') or '__' not in filename:
+            continue
+        kind, name = filename[:-len('.html')].split('__', 1)
+        with open(os.path.join(fixtures_dir, filename), 'rb') as f:
+            fixtures.append((kind, name, f.read()))
+    return fixtures
+
+
+def find_site(checker, kind, name):
+    sites = checker.fact_checkers if kind == 'factcheck' else (
+        checker.trusted_sources['indonesia'] + checker.trusted_sources['international']
+    )
+    for site in sites:
+        if safe_name(site['name']) == name:
+            return site
+    return None
+
+
+def extractor_for(kind, name, checker, explainer):
+    if kind == 'article':
+        return lambda html: explainer.parse_article_content(html)
+
+    site = find_site(checker, kind, name)
+    if site is None:
+        return None
+    if kind == 'factcheck':
+        return lambda html: checker.parse_fact_checks(site, html)
+    return lambda html: checker.parse_search_results(site, html, max_results=3)
+
+
+def time_extraction(extract, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = extract(html)
+    return (time.perf_counter() - start) / repeat * 1000.0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full html.parser parsing against the fast parsing path")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--save", metavar="QUERY", help="Fetch and save live search/article pages for QUERY first")
+    parser.add_argument("--check", action="store_true",
+                        help="Parity check only: exit non-zero if any fixture differs or extracts nothing")
+    args = parser.parse_args()
+    if args.check:
+        args.repeat = 1
+
+    legacy_checker = RealTimeNewsChecker(fast_parsing=False)
+    fast_checker = RealTimeNewsChecker(fast_parsing=True)
+    legacy_explainer = NewsExplainer(fast_parsing=False)
+    fast_explainer = NewsExplainer(fast_parsing=True)
+
+    if args.save:
+        save_fixtures(fast_checker, args.fixtures, args.save)
+
+    fixtures = load_fixtures(args.fixtures) if os.path.isdir(args.fixtures) else []
+    if not fixtures:
+        print(f"No fixtures found in {args.fixtures}; run with --save QUERY to capture some")
+        raise SystemExit(1 if args.check else 0)
+
+    print(f"Fast path parser: {HTML_PARSER}")
+    print(f"{'fixture':40}{'legacy ms':>12}{'fast ms':>12}{'speedup':>10}  parity")
+
+    total_legacy = total_fast = 0.0
+    mismatches = empty = 0
+    for kind, name, html in fixtures:
+        legacy = extractor_for(kind, name, legacy_checker, legacy_explainer)
+        fast = extractor_for(kind, name, fast_checker, fast_explainer)
+        if legacy is None:
+            print(f"{kind}__{name}: unknown source, skipped")
+            continue
+
+        legacy_ms, legacy_result = time_extraction(legacy, html, args.repeat)
+        fast_ms, fast_result = time_extraction(fast, html, args.repeat)
+        same = legacy_result == fast_result
+        mismatches += 0 if same else 1
+        # A fixture neither path extracts anything from proves nothing about parity
+        empty += 0 if legacy_result else 1
+        total_legacy += legacy_ms
+        total_fast += fast_ms
+
+        status = 'DIFFERENT' if not same else 'ok' if legacy_result else 'ok (empty)'
+        print(f"{kind + '__' + name:40}{legacy_ms:>12.2f}{fast_ms:>12.2f}"
+              f"{legacy_ms / fast_ms if fast_ms else 0:>9.1f}x  {status}")
+
+    if total_fast:
+        print(f"\nTotal: legacy {total_legacy:.1f} ms, fast {total_fast:.1f} ms "
+              f"({total_legacy / total_fast:.1f}x), {mismatches} fixture(s) with different output")
+
+    if args.check and (mismatches or empty):
+        raise SystemExit(f"Parity check failed: {mismatches} different, {empty} with nothing extracted")
+
+
+if __name__ == "__main__":
+    main()
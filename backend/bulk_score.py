@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Set in each worker process by init_worker
+_detector = None
+
+OUTPUT_FIELDS = ["row", "id", "prediction", "confidence", "weighted_score", "error"]
+
+
+def detect_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def iter_records(path, fmt, text_column, id_column=None):
+    # Yields (row, id, text) lazily so the corpus never has to fit in memory
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for row_number, row in enumerate(rows):
+            if isinstance(row, str):
+                row = {text_column: row}
+            record_id = row.get(id_column) if id_column else None
+            yield row_number, record_id, row.get(text_column) or ""
+
+
+def count_records(path, fmt):
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            return sum(1 for _ in csv.reader(f)) - 1
+        return sum(1 for line in f if line.strip())
+
+
+def iter_batches(records, batch_size):
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def init_worker(backend, quantize, threads):
+    # Each worker loads the detectors once and reuses them for every batch it scores
+    global _detector
+    import torch
+    from huggingface_detector import MultiModelDetector
+
+    logging.basicConfig(level=logging.WARNING)
+    torch.set_num_threads(threads)
+    _detector = MultiModelDetector(backend=backend, quantize=quantize)
+
+
+def score_batch(texts, model_batch_size, max_tokens):
+    return _detector.predict_ensemble_batch(texts, batch_size=model_batch_size, max_tokens=max_tokens)
+
+
+class OutputWriter:
+    """Appends scored rows as JSONL or CSV, picked from the output file extension"""
+
+    def __init__(self, path, resume_offset=None):
+        self.path = path
+        self.is_csv = path.lower().endswith(".csv")
+        self.file = open(path, "r+" if resume_offset is not None else "w", newline="", encoding="utf-8")
+
+        if resume_offset is not None:
+            # Drop anything written after the last checkpoint
+            self.file.seek(resume_offset)
+            self.file.truncate()
+
+        self.csv_writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS) if self.is_csv else None
+        if self.is_csv and resume_offset is None:
+            self.csv_writer.writeheader()
+
+    def write(self, row_number, record_id, result):
+        line = {
+            "row": row_number,
+            "id": record_id,
+            "prediction": result.get("prediction"),
+            "confidence": result.get("confidence"),
+            "weighted_score": result.get("weighted_score"),
+            "error": result.get("error")
+        }
+        if self.is_csv:
+            self.csv_writer.writerow(line)
+        else:
+            self.file.write(json.dumps(line) + "\n")
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def load_checkpoint(path, input_path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("input") != os.path.abspath(input_path):
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint.get('input')}, not {input_path}")
+    return checkpoint
+
+
+def save_checkpoint(path, input_path, rows_done, output_offset):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"input": os.path.abspath(input_path), "rows_done": rows_done, "output_offset": output_offset}, f)
+    os.replace(tmp_path, path)
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL corpus with the transformer ensemble")
+    parser.add_argument("input", help="CSV with a header row, or JSONL of objects or strings")
+    parser.add_argument("output", help="Output path; .csv writes CSV, anything else JSONL")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from extension)")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--id-column", help="Column copied to the output to identify each row")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: cores / threads)")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts sent to a worker at a time")
+    parser.add_argument("--model-batch-size", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=8192)
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--quantize", default="", help="Comma-separated members to load as INT8, e.g. bert_news")
+    parser.add_argument("--checkpoint", help="Checkpoint path (default: OUTPUT.ckpt)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint instead of starting over")
+    parser.add_argument("--no-count", action="store_true", help="Skip the counting pass (no ETA)")
+    parser.add_argument("--report-every", type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.input)
+    checkpoint_path = args.checkpoint or args.output + ".ckpt"
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads_per_worker)
+    quantize = tuple(name for name in args.quantize.split(",") if name)
+
+    checkpoint = load_checkpoint(checkpoint_path, args.input) if args.resume else None
+    rows_done = checkpoint["rows_done"] if checkpoint else 0
+    total = None if args.no_count else count_records(args.input, fmt)
+    if checkpoint:
+        print(f"Resuming after {rows_done} rows", file=sys.stderr)
+
+    records = islice(iter_records(args.input, fmt, args.text_column, args.id_column), rows_done, None)
+    writer = OutputWriter(args.output, resume_offset=checkpoint["output_offset"] if checkpoint else None)
+
+    # spawn keeps workers independent of this process's torch threads
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(args.backend, quantize, args.threads_per_worker)
+    )
+
+    start = last_report = time.perf_counter()
+    scored = 0
+    # At most two batches per worker in flight, written back in input order
+    in_flight = deque()
+    batches = iter_batches(records, args.batch_size)
+
+    def drain_oldest():
+        nonlocal rows_done, scored
+        batch, future = in_flight.popleft()
+        for (row_number, record_id, _), result in zip(batch, future.result()):
+            writer.write(row_number, record_id, result)
+        rows_done += len(batch)
+        scored += len(batch)
+        save_checkpoint(checkpoint_path, args.input, rows_done, writer.flush())
+
+    try:
+        for batch in batches:
+            texts = [text for _, _, text in batch]
+            in_flight.append((batch, executor.submit(score_batch, texts, args.model_batch_size, args.max_tokens)))
+            if len(in_flight) >= workers * 2:
+                drain_oldest()
+
+            now = time.perf_counter()
+            if now - last_report >= args.report_every and scored:
+                rate = scored / (now - start)
+                eta = f", ETA {format_eta((total - rows_done) / rate)}" if total else ""
+                print(f"{rows_done}{'/' + str(total) if total else ''} rows, {rate:.1f} texts/s{eta}", file=sys.stderr)
+                last_report = now
+
+        while in_flight:
+            drain_oldest()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {scored} texts in {elapsed:.1f}s ({scored / elapsed if elapsed else 0:.1f} texts/s) "
+          f"with {workers} worker(s) x {args.threads_per_worker} thread(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
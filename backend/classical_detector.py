@@ -0,0 +1,120 @@
+import logging
+import os
+import pickle
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+CLASSICAL_MODELS = {
+    "logistic_regression": "logistic_regression.pkl",
+    "naive_bayes": "naive_bayes.pkl",
+    "random_forest": "random_forest.pkl"
+}
+
+
+def preprocess_text(text: str) -> str:
+    # The bundled vectorizer was fitted on text cleaned this way
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+class ClassicalDetector:
+    """TF-IDF vectorizer plus the bundled scikit-learn classifiers (class 1 is fake, as for the transformers)"""
+
+    def __init__(self, models_dir: str = MODELS_DIR):
+        with open(os.path.join(models_dir, "vectorizer.pkl"), "rb") as f:
+            self.vectorizer = pickle.load(f)
+
+        self.models = {}
+        for model_name, filename in CLASSICAL_MODELS.items():
+            with open(os.path.join(models_dir, filename), "rb") as f:
+                self.models[model_name] = pickle.load(f)
+        logging.info(f"Loaded classical models: {', '.join(self.models)}")
+
+    def predict(self, text: str) -> Dict[str, Any]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list) -> list:
+        # One sparse matrix for the whole batch, shared by every classifier
+        features = self.vectorizer.transform([preprocess_text(text) for text in texts])
+
+        fake_probabilities = {}
+        for model_name, model in self.models.items():
+            fake_column = list(model.classes_).index(1)
+            fake_probabilities[model_name] = model.predict_proba(features)[:, fake_column]
+
+        results = []
+        for i in range(len(texts)):
+            individual = {
+                model_name: {
+                    "prediction": "FAKE" if probabilities[i] > 0.5 else "REAL",
+                    "confidence": float(max(probabilities[i], 1 - probabilities[i])),
+                    "probabilities": {"real": float(1 - probabilities[i]), "fake": float(probabilities[i])}
+                }
+                for model_name, probabilities in fake_probabilities.items()
+            }
+            fake_probability = float(np.mean([probabilities[i] for probabilities in fake_probabilities.values()]))
+            results.append({
+                "prediction": "FAKE" if fake_probability > 0.5 else "REAL",
+                "confidence": max(fake_probability, 1 - fake_probability),
+                "weighted_score": fake_probability,
+                "unanimous": len({result["prediction"] for result in individual.values()}) == 1,
+                "individual_results": individual,
+                "method": "classical"
+            })
+        return results
+
+
+class CascadeDetector:
+    """Lets the classical models decide clear-cut texts and escalates the rest to the transformers.
+
+    A text is escalated when the classical models disagree, or when their mean
+    fake probability falls inside the uncertainty band [low, high].
+    """
+
+    def __init__(self, classical: ClassicalDetector, uncertainty_band: Tuple[float, float] = (0.1, 0.9)):
+        self.classical = classical
+        self.low, self.high = uncertainty_band
+        self._lock = threading.Lock()
+        self._stats = {"classical": 0, "transformer": 0}
+
+    def is_decisive(self, result: Dict[str, Any]) -> bool:
+        return result["unanimous"] and not (self.low <= result["weighted_score"] <= self.high)
+
+    def predict(self, text: str, escalate) -> Dict[str, Any]:
+        return self.predict_batch([text], lambda texts: [escalate(texts[0])])[0]
+
+    def predict_batch(self, texts: list, escalate_batch) -> List[Dict[str, Any]]:
+        """escalate_batch(texts) returns transformer results for the texts the classical tier leaves open"""
+        results = self.classical.predict_batch(texts)
+        escalated = [i for i, result in enumerate(results) if not self.is_decisive(result)]
+
+        for result in results:
+            result["decision_tier"] = "classical"
+
+        if escalated:
+            transformer_results = escalate_batch([texts[i] for i in escalated])
+            for i, transformer_result in zip(escalated, transformer_results):
+                transformer_result["decision_tier"] = "transformer"
+                transformer_result["classical_result"] = results[i]
+                results[i] = transformer_result
+
+        with self._lock:
+            self._stats["classical"] += len(texts) - len(escalated)
+            self._stats["transformer"] += len(escalated)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["classical"] + self._stats["transformer"]
+            return {
+                "uncertainty_band": [self.low, self.high],
+                "decided_by": dict(self._stats),
+                "transformer_calls_saved": self._stats["classical"] / total if total else 0.0
+            }
@@ -0,0 +1,386 @@
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+DB_PATH = 'hoax_detection.db'
+
+# Idle read connections per (pid, db_path); request threads come and go, so
+# connections are lent out per call rather than tied to a thread
+POOL_SIZE = 8
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connect(db_path: str = DB_PATH, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=check_same_thread)
+    # WAL lets readers proceed while a write is in progress; NORMAL only
+    # fsyncs at checkpoints, which is safe in WAL mode
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+@contextmanager
+def get_connection(db_path: str = DB_PATH):
+    """Borrow a connection from this process's pool; a forked child starts a pool of its own"""
+    key = (os.getpid(), db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = queue.LifoQueue(maxsize=POOL_SIZE)
+
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = connect(db_path, check_same_thread=False)
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def init_db(db_path: str = DB_PATH):
+    conn = connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            news_text TEXT NOT NULL,
+            prediction TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_history_timestamp ON analysis_history (timestamp)')
+    # Matches the case-insensitive prediction filter and the newest-first keyset
+    # order of query_history; the earlier BINARY index could serve neither
+    cursor.execute('DROP INDEX IF EXISTS idx_analysis_history_prediction')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analysis_history_prediction_nocase
+        ON analysis_history (prediction COLLATE NOCASE, timestamp, id)
+    ''')
+
+    # Full results, stored once per distinct text+result and shared by history rows
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_results (
+            hash TEXT PRIMARY KEY,
+            result BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(analysis_history)')]
+    if 'result_hash' not in columns:
+        cursor.execute('ALTER TABLE analysis_history ADD COLUMN result_hash TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_analysis_history_result_hash ON analysis_history (result_hash)')
+    conn.commit()
+    init_history_fts(conn)
+    conn.close()
+
+
+def init_history_fts(conn: sqlite3.Connection) -> bool:
+    """Create the FTS5 index over news_text, kept in sync by triggers; False when FTS5 is unavailable"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'analysis_history_fts'"
+    ).fetchone() is not None
+    try:
+        with conn:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS analysis_history_fts
+                USING fts5(news_text, content='analysis_history', content_rowid='id')
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS analysis_history_fts_insert AFTER INSERT ON analysis_history BEGIN
+                    INSERT INTO analysis_history_fts (rowid, news_text) VALUES (new.id, new.news_text);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS analysis_history_fts_delete AFTER DELETE ON analysis_history BEGIN
+                    INSERT INTO analysis_history_fts (analysis_history_fts, rowid, news_text)
+                    VALUES ('delete', old.id, old.news_text);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS analysis_history_fts_update AFTER UPDATE OF news_text ON analysis_history BEGIN
+                    INSERT INTO analysis_history_fts (analysis_history_fts, rowid, news_text)
+                    VALUES ('delete', old.id, old.news_text);
+                    INSERT INTO analysis_history_fts (rowid, news_text) VALUES (new.id, new.news_text);
+                END
+            ''')
+            # Index the rows that existed before the table was created
+            if not exists:
+                conn.execute("INSERT INTO analysis_history_fts (analysis_history_fts) VALUES ('rebuild')")
+        return True
+    except sqlite3.OperationalError as e:
+        logging.warning(f"Full-text search unavailable, falling back to LIKE: {str(e)}")
+        return False
+
+
+def has_history_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'analysis_history_fts'"
+    ).fetchone() is not None
+
+
+def encode_cursor(timestamp: str, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, row_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(timestamp), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def fts_query(search: str) -> str:
+    # Quote every word so user input is matched literally rather than as FTS syntax
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in search.split())
+
+
+def query_history(conn: sqlite3.Connection, limit: int = 20, cursor: str = None, prediction: str = None,
+                  min_confidence: float = None, max_confidence: float = None,
+                  search: str = None) -> Tuple[List[tuple], Optional[str]]:
+    """Newest-first page of history rows plus the cursor of the next page (None on the last page).
+
+    Pages are keyed on (timestamp, id), so fetching page N costs the same as page 1.
+    """
+    clauses, params = [], []
+    if cursor:
+        clauses.append('(timestamp, id) < (?, ?)')
+        params.extend(decode_cursor(cursor))
+    if prediction:
+        clauses.append('prediction = ? COLLATE NOCASE')
+        params.append(prediction)
+    if min_confidence is not None:
+        clauses.append('confidence >= ?')
+        params.append(min_confidence)
+    if max_confidence is not None:
+        clauses.append('confidence <= ?')
+        params.append(max_confidence)
+    if search and search.split():
+        if has_history_fts(conn):
+            clauses.append('id IN (SELECT rowid FROM analysis_history_fts WHERE analysis_history_fts MATCH ?)')
+            params.append(fts_query(search))
+        else:
+            clauses.append("news_text LIKE ? ESCAPE '\\'")
+            params.append('%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    rows = conn.execute(f'''
+        SELECT id, SUBSTR(news_text, 1, 100) as preview, prediction, confidence, timestamp
+        FROM analysis_history
+        {where}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT ?
+    ''', (*params, limit + 1)).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][4], rows[-1][0])
+    return rows, next_cursor
+
+
+def current_timestamp() -> str:
+    # Same format and timezone (UTC) as SQLite's CURRENT_TIMESTAMP
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def pack_result(news_text: str, result: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Content hash and zlib-compressed JSON of a result; the per-request 'cached' flag is left out"""
+    payload = json.dumps({k: v for k, v in result.items() if k != 'cached'}, sort_keys=True)
+    digest = hashlib.sha256(news_text.encode('utf-8') + b'\0' + payload.encode('utf-8')).hexdigest()
+    return digest, zlib.compress(payload.encode('utf-8'))
+
+
+def unpack_result(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+def store_history(conn: sqlite3.Connection, rows: List[tuple]):
+    """Insert (news_text, prediction, confidence, timestamp, result) rows in the caller's transaction"""
+    history = []
+    for news_text, prediction, confidence, timestamp, result in rows:
+        result_hash = None
+        if result is not None:
+            result_hash, blob = pack_result(news_text, result)
+            conn.execute(
+                'INSERT OR IGNORE INTO analysis_results (hash, result, size, created_at) VALUES (?, ?, ?, ?)',
+                (result_hash, blob, len(blob), time.time())
+            )
+        history.append((news_text, prediction, confidence, timestamp or current_timestamp(), result_hash))
+
+    conn.executemany('''
+        INSERT INTO analysis_history (news_text, prediction, confidence, timestamp, result_hash)
+        VALUES (?, ?, ?, ?, ?)
+    ''', history)
+
+
+def get_history_entry(conn: sqlite3.Connection, entry_id: int) -> Optional[Dict[str, Any]]:
+    row = conn.execute('''
+        SELECT h.id, h.news_text, h.prediction, h.confidence, h.timestamp, r.result
+        FROM analysis_history h LEFT JOIN analysis_results r ON r.hash = h.result_hash
+        WHERE h.id = ?
+    ''', (entry_id,)).fetchone()
+    if row is None:
+        return None
+    return {
+        'id': row[0],
+        'news_text': row[1],
+        'prediction': row[2],
+        'confidence': row[3],
+        'timestamp': row[4],
+        'result': unpack_result(row[5]) if row[5] is not None else None
+    }
+
+
+def prune_history(db_path: str = DB_PATH, retention_days: float = 90, vacuum: bool = False) -> Dict[str, int]:
+    """Delete history older than retention_days and results no longer referenced, optionally compacting the file"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = connect(db_path)
+    with conn:
+        history = conn.execute('DELETE FROM analysis_history WHERE timestamp < ?', (cutoff,)).rowcount
+        results = conn.execute('''
+            DELETE FROM analysis_results
+            WHERE NOT EXISTS (SELECT 1 FROM analysis_history h WHERE h.result_hash = analysis_results.hash)
+        ''').rowcount
+    if has_history_fts(conn):
+        conn.execute("INSERT INTO analysis_history_fts (analysis_history_fts) VALUES ('optimize')")
+        conn.commit()
+    if vacuum:
+        # VACUUM rewrites the whole file, so it is opt-in for quiet periods
+        conn.execute('VACUUM')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    return {'history_deleted': history, 'results_deleted': results}
+
+
+class HistoryWriter:
+    """Background writer that group-commits analysis_history inserts.
+
+    Rows are queued by request threads and written by one thread in a single
+    transaction per batch, so a burst of analyses costs one commit instead of
+    one per request. Rows become visible after at most max_wait seconds.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, batch_size: int = 100, max_wait: float = 0.05,
+                 max_queue: int = 10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._stats = {'queued': 0, 'written': 0, 'batches': 0, 'errors': 0}
+
+        atexit.register(self.flush)
+
+    def add(self, news_text: str, prediction: str, confidence: float, result: Dict[str, Any] = None):
+        self._ensure_worker()
+        # Blocks only when the writer has fallen max_queue rows behind
+        self._queue.put((news_text, prediction, confidence, current_timestamp(), result))
+        with self._lock:
+            self._stats['queued'] += 1
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until every queued row has been written"""
+        if self._worker is None or self._worker_pid != os.getpid():
+            return
+        self._ensure_worker()
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, 'pending': self._queue.qsize()}
+
+    def _worker_running(self):
+        return self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive()
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so a child process starts its own writer,
+        # and a writer that died on an unexpected error is replaced
+        if self._worker_running():
+            return
+        with self._lock:
+            if self._worker_running():
+                return
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        conn = connect(self.db_path)
+        while True:
+            rows = [self._queue.get()]
+            # Collect whatever else arrives within max_wait, up to batch_size
+            deadline = time.monotonic() + self.max_wait
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(conn, rows)
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _write_batch(self, conn, rows):
+        try:
+            with conn:
+                store_history(conn, rows)
+            with self._lock:
+                self._stats['written'] += len(rows)
+                self._stats['batches'] += 1
+            return
+        except Exception as e:
+            if len(rows) == 1:
+                self._drop_row(e)
+                return
+            logging.warning(f"Error writing a batch of {len(rows)} history rows, retrying one by one: {str(e)}")
+
+        # One bad row rolled back the whole batch: write the others on their own
+        written = 0
+        for row in rows:
+            try:
+                with conn:
+                    store_history(conn, [row])
+                written += 1
+            except Exception as e:
+                self._drop_row(e)
+        with self._lock:
+            self._stats['written'] += written
+            self._stats['batches'] += 1
+
+    def _drop_row(self, error):
+        # Rows that cannot be stored (bad result payload, locked DB) are
+        # dropped and counted; the writer keeps serving the queue
+        logging.error(f"Error writing history row: {str(error)}")
+        with self._lock:
+            self._stats['errors'] += 1
@@ -0,0 +1,91 @@
+import importlib.util
+import os
+from functools import lru_cache
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+def _pick_parser():
+    # lxml's C parser is several times faster than html.parser; fall back when it is missing
+    requested = os.environ.get('HTML_PARSER')
+    if requested:
+        return requested
+    return 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+
+HTML_PARSER = _pick_parser()
+
+# Default selector sets, in the order the extraction code walks them
+SEARCH_RESULT_SELECTORS = (
+    'article', '.article', '.news-item', '.search-result',
+    'h2 a', 'h3 a', '.title a', '.headline a'
+)
+FACT_CHECK_SELECTORS = ('.fact-check', '.rating')
+ARTICLE_CONTENT_SELECTORS = (
+    '.article-content', '.post-content', '.entry-content',
+    '.content', '.text', '.body', 'article p',
+    '.detail-content', '.news-content'
+)
+
+
+class _RootStrainer(SoupStrainer):
+    """Keeps a tag (and its subtree) when is_root(name, attrs) says so.
+
+    A callable passed to SoupStrainer only sees the tag name from bs4 4.13 on,
+    so the raw name and attributes are taken from the hook each version calls
+    before building a tag: search_tag() up to 4.12, allow_tag_creation() after.
+    """
+
+    def __init__(self, is_root):
+        super().__init__()
+        self.is_root = is_root
+
+    def search_tag(self, markup_name=None, markup_attrs=None):
+        return self.is_root(markup_name, markup_attrs)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.is_root(name, attrs)
+
+
+class SelectorSet:
+    """CSS selectors compiled once, plus a strainer that only builds the subtrees they can match"""
+
+    def __init__(self, selectors, extra_roots=()):
+        self.selectors = tuple(selectors)
+        self.compiled = [soupsieve.compile(selector) for selector in self.selectors]
+
+        # Each selector can only match inside a subtree rooted at its first
+        # compound selector (e.g. 'h2' for 'h2 a', class 'title' for '.title a')
+        self.root_tags = set(extra_roots)
+        self.root_classes = set()
+        for selector in self.selectors:
+            first = selector.split()[0]
+            if first.startswith('.'):
+                self.root_classes.add(first[1:])
+            else:
+                tag = first.split('.')[0].split('#')[0].split('[')[0]
+                self.root_tags.add(tag)
+                self.root_classes.update(first.split('.')[1:])
+
+    def _is_root(self, name, attrs):
+        if name in self.root_tags:
+            return True
+
+        classes = (attrs or {}).get('class') or ()
+        if isinstance(classes, str):
+            classes = classes.split()
+        return any(cls in self.root_classes for cls in classes)
+
+    def parse(self, html, fast=True):
+        if not fast:
+            return BeautifulSoup(html, 'html.parser')
+        return BeautifulSoup(html, HTML_PARSER, parse_only=_RootStrainer(self._is_root))
+
+    def select(self, soup, index, limit=0):
+        return self.compiled[index].select(soup, limit=limit)
+
+
+@lru_cache(maxsize=64)
+def get_selector_set(selectors, extra_roots=()):
+    return SelectorSet(selectors, extra_roots)
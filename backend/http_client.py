@@ -0,0 +1,245 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class RateLimitTimeout(requests.exceptions.Timeout):
+    """The domain's rate limit would delay the request past the caller's deadline"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, sleeping until one is available. Returns the time waited.
+        Raises RateLimitTimeout rather than waiting more than `timeout` seconds."""
+        waited = 0.0
+        while True:
+            delay = self._take()
+            if delay is None:
+                return waited
+            if timeout is not None and waited + delay > timeout:
+                raise RateLimitTimeout(f"Rate limit wait of {waited + delay:.2f}s exceeds {max(timeout, 0.0):.2f}s")
+
+            # Sleep outside the lock so other domains and callers are not blocked
+            time.sleep(delay)
+            waited += delay
+
+    def _take(self):
+        # Returns None when a token was taken, else the seconds until one is available
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return None
+            return (1.0 - self.tokens) / self.rate
+
+
+_rate_limit_local = threading.local()
+
+
+def _rate_limit_connection(db_path):
+    # One connection per thread and database file, reopened in a forked child
+    pid = os.getpid()
+    if getattr(_rate_limit_local, 'pid', None) != pid:
+        _rate_limit_local.pid = pid
+        _rate_limit_local.connections = {}
+    conn = _rate_limit_local.connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+        # Token updates are tiny and frequent: WAL, and no fsync per commit
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _rate_limit_local.connections[db_path] = conn
+    return conn
+
+
+def _drop_rate_limit_connection(db_path):
+    conn = _rate_limit_local.connections.pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket stored in SQLite, so every process using db_path draws from the same tokens"""
+
+    def __init__(self, db_path, domain, rate, capacity):
+        super().__init__(rate, capacity)
+        self.db_path = db_path
+        self.domain = domain
+
+    def _take(self):
+        try:
+            conn = _rate_limit_connection(self.db_path)
+            try:
+                # IMMEDIATE takes the write lock up front, so the read-modify-write is atomic across processes
+                conn.execute('BEGIN IMMEDIATE')
+                row = conn.execute('SELECT tokens, updated FROM rate_limits WHERE domain = ?', (self.domain,)).fetchone()
+                now = time.time()
+                tokens = self.capacity if row is None else min(
+                    self.capacity, row[0] + max(0.0, now - row[1]) * self.rate
+                )
+                delay = None
+                if tokens >= 1.0:
+                    tokens -= 1.0
+                else:
+                    delay = (1.0 - tokens) / self.rate
+                conn.execute(
+                    'INSERT OR REPLACE INTO rate_limits (domain, tokens, updated) VALUES (?, ?, ?)',
+                    (self.domain, tokens, now)
+                )
+                conn.execute('COMMIT')
+                return delay
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            _drop_rate_limit_connection(self.db_path)
+            # Fall back to this process's own bucket rather than failing the request
+            logging.warning(f"Shared rate limiter unavailable for {self.domain}: {e}")
+            return super()._take()
+
+
+class HttpClient:
+    """Shared HTTP layer: pooled keep-alive connections, retries and per-domain rate limiting"""
+
+    def __init__(self, pool_connections=16, pool_maxsize=16, retries=2, backoff_factor=0.3,
+                 rate=1.0, burst=2, domain_rates=None, headers=None, db_path=None):
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        # One connection pool per host, each keeping up to pool_maxsize sockets alive
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # domain_rates overrides the default (rate, burst) for specific domains
+        self.rate = rate
+        self.burst = burst
+        self.domain_rates = domain_rates or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        # With db_path the buckets live in SQLite and the rates hold for all
+        # processes together; without it each process gets the full rate
+        self.db_path = db_path
+        if db_path:
+            self._init_db()
+
+        # Per-thread absolute deadline (time.monotonic()) set by deadline()
+        self._local = threading.local()
+
+        self._requests = {}
+        self._throttled_seconds = {}
+        self._deadline_skips = {}
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                domain TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    @contextmanager
+    def deadline(self, deadline):
+        """Requests made by this thread inside the block give up waiting for
+        the rate limiter at `deadline`, a time.monotonic() value"""
+        previous = getattr(self._local, 'deadline', None)
+        self._local.deadline = deadline
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    @staticmethod
+    def domain_of(url):
+        host = urlparse(url).hostname or ''
+        return host[4:] if host.startswith('www.') else host
+
+    def get(self, url, timeout=10, **kwargs):
+        domain = self.domain_of(url)
+        deadline = getattr(self._local, 'deadline', None)
+        try:
+            waited = self._bucket(domain).acquire(
+                timeout=None if deadline is None else deadline - time.monotonic()
+            )
+        except RateLimitTimeout:
+            with self._lock:
+                self._deadline_skips[domain] = self._deadline_skips.get(domain, 0) + 1
+            raise
+
+        with self._lock:
+            self._requests[domain] = self._requests.get(domain, 0) + 1
+            self._throttled_seconds[domain] = self._throttled_seconds.get(domain, 0.0) + waited
+
+        return self.session.get(url, timeout=timeout, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                domain: {
+                    'requests': self._requests.get(domain, 0),
+                    'throttled_seconds': round(self._throttled_seconds.get(domain, 0.0), 3),
+                    'deadline_skips': self._deadline_skips.get(domain, 0)
+                }
+                for domain in set(self._requests) | set(self._deadline_skips)
+            }
+
+    def _bucket(self, domain):
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                rate, burst = self.domain_rates.get(domain, (self.rate, self.burst))
+                if self.db_path:
+                    bucket = SharedTokenBucket(self.db_path, domain, rate, burst)
+                else:
+                    bucket = TokenBucket(rate, burst)
+                self._buckets[domain] = bucket
+            return bucket
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client():
+    """Process-wide default client, created on first use; its rate limits are per process"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
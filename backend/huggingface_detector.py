@@ -1,101 +1,547 @@
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 import numpy as np
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
 import logging
+import os
+import threading
+import time
+from onnx_backend import OnnxSession, export_to_onnx, onnx_model_path
+from readiness import Readiness
+
+WINDOW_AGGREGATIONS = ("max", "mean", "headline")
+
+PARITY_TEXTS = [
+    "BREAKING: Scientists Discover Miracle Cure That Doctors Don't Want You to Know!",
+    "The Federal Reserve announced a 0.25% interest rate increase following today's meeting.",
+    "Pemerintah mengumumkan kenaikan harga BBM mulai pekan depan setelah rapat kabinet terbatas."
+]
 
 class HuggingFaceDetector:
-    def __init__(self, model_name: str = "jy46604790/Fake-News-Bert-Detect"):
+    def __init__(self, model_name: str = "jy46604790/Fake-News-Bert-Detect", backend: str = "torch",
+                 onnx_cache_dir: str = None, parity_tolerance: float = 1e-3, quantize: bool = False,
+                 load: bool = True, long_document: bool = False, max_chars: int = 50000, window_overlap: int = 128,
+                 max_windows: int = 8, aggregation: str = "max", headline_weight: float = 0.5,
+                 intra_op_threads: int = None):
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown inference backend: {backend}")
+        if aggregation not in WINDOW_AGGREGATIONS:
+            raise ValueError(f"Unknown window aggregation: {aggregation}")
+        if quantize and backend != "torch":
+            raise ValueError("Dynamic quantization is only supported with the torch backend")
+        
         self.model_name = model_name
+        self.backend = backend
+        self.onnx_cache_dir = onnx_cache_dir
+        self.parity_tolerance = parity_tolerance
+        self.quantize = quantize
+        # Thread budget of the ONNX session; None lets onnxruntime use every core
+        self.intra_op_threads = intra_op_threads
+        # Input beyond max_chars is dropped before tokenizing. In long-document
+        # mode the rest is scored as up to max_windows overlapping 512-token windows
+        self.long_document = long_document
+        self.max_chars = max_chars
+        self.window_overlap = window_overlap
+        self.max_windows = max_windows
+        self.aggregation = aggregation
+        self.headline_weight = headline_weight
         self.tokenizer = None
         self.model = None
+        self.onnx_session = None
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.load_model()
+        if load:
+            self.load_model()
     
     def load_model(self):
         try:
-            logging.info(f"Loading Hugging Face model: {self.model_name}")
+            variant = f"{self.backend} backend, int8" if self.quantize else f"{self.backend} backend"
+            logging.info(f"Loading Hugging Face model: {self.model_name} ({variant})")
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
-            self.model.to(self.device)
-            self.model.eval()
+            if self.backend == "onnx":
+                self._load_onnx()
+            else:
+                self._load_torch()
             logging.info("Model loaded successfully")
         except Exception as e:
             logging.error(f"Error loading model: {str(e)}")
             raise
     
+    def _load_torch(self):
+        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        self.model.eval()
+        
+        if self.quantize:
+            # Dynamic INT8 kernels are CPU-only, so the quantized variant stays on CPU
+            self.device = torch.device("cpu")
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        
+        self.model.to(self.device)
+    
+    def _load_onnx(self):
+        path = onnx_model_path(self.model_name, self.onnx_cache_dir)
+        if os.path.exists(path):
+            self.onnx_session = OnnxSession(path, self.intra_op_threads)
+            return
+        
+        # First run: export once from the torch weights, then keep the graph
+        # only if it reproduces the torch outputs
+        self._load_torch()
+        export_to_onnx(self.model, self.tokenizer, path)
+        self.onnx_session = OnnxSession(path, self.intra_op_threads)
+        
+        report = self.check_parity(PARITY_TEXTS)
+        if not report["passed"]:
+            os.remove(path)
+            self.onnx_session = None
+            raise RuntimeError(
+                f"ONNX export of {self.model_name} failed parity check "
+                f"(max probability difference {report['max_abs_diff']:.6f})"
+            )
+        
+        # The torch weights are no longer needed once the graph is verified
+        self.model = None
+    
+    def reopen_session(self):
+        # Rebuilds the ONNX session with the current thread budget, e.g. after it changed
+        if self.onnx_session is not None:
+            self.onnx_session = OnnxSession(self.onnx_session.path, self.intra_op_threads)
+    
+    def check_parity(self, texts: list) -> Dict[str, Any]:
+        # Compare the ONNX graph against the torch model on the same inputs
+        if self.onnx_session is None:
+            raise RuntimeError("Parity check needs the ONNX backend")
+        if self.model is None:
+            self._load_torch()
+        
+        inputs = self.tokenizer(list(texts), return_tensors="pt", truncation=True, padding=True, max_length=512)
+        torch_probs = self._torch_forward(inputs).cpu()
+        onnx_probs = self._onnx_forward(inputs)
+        
+        max_abs_diff = torch.max(torch.abs(torch_probs - onnx_probs)).item()
+        agreement = (torch.argmax(torch_probs, dim=-1) == torch.argmax(onnx_probs, dim=-1)).float().mean().item()
+        
+        return {
+            "model": self.model_name,
+            "texts": len(texts),
+            "max_abs_diff": max_abs_diff,
+            "label_agreement": agreement,
+            "passed": max_abs_diff <= self.parity_tolerance and agreement == 1.0
+        }
+    
+    def _forward(self, inputs) -> torch.Tensor:
+        # Returns class probabilities for a tokenized batch on either backend
+        if self.onnx_session is not None:
+            return self._onnx_forward(inputs)
+        return self._torch_forward(inputs)
+    
+    def _torch_forward(self, inputs) -> torch.Tensor:
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+            return torch.softmax(outputs.logits, dim=-1)
+    
+    def _onnx_forward(self, inputs) -> torch.Tensor:
+        logits = self.onnx_session.run({k: v.cpu().numpy() for k, v in inputs.items()})
+        return torch.softmax(torch.from_numpy(logits), dim=-1)
+    
     def predict(self, text: str) -> Dict[str, Any]:
+        if self.long_document:
+            return self._predict_windows(text)
+        
         try:
             # Truncate text to max 512 tokens
             inputs = self.tokenizer(
-                text, 
+                text[:self.max_chars], 
                 return_tensors="pt", 
                 truncation=True, 
                 padding=True, 
                 max_length=512
             )
             
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            probabilities = self._forward(inputs)
             
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probabilities = torch.softmax(logits, dim=-1)
-                
-            # Get prediction
-            predicted_class = torch.argmax(probabilities, dim=-1).item()
-            confidence = torch.max(probabilities).item()
-            
-            # Map class to label (0: Real, 1: Fake)
-            prediction = "FAKE" if predicted_class == 1 else "REAL"
+            return self._format_result(probabilities[0])
             
+        except Exception as e:
+            logging.error(f"Error in prediction: {str(e)}")
             return {
-                "prediction": prediction,
-                "confidence": confidence,
-                "model": self.model_name,
-                "probabilities": {
-                    "real": probabilities[0][0].item(),
-                    "fake": probabilities[0][1].item() if probabilities.shape[1] > 1 else 1 - probabilities[0][0].item()
-                }
+                "prediction": "ERROR",
+                "confidence": 0.0,
+                "error": str(e)
+            }
+    
+    def _format_result(self, probabilities) -> Dict[str, Any]:
+        # Get prediction
+        predicted_class = torch.argmax(probabilities, dim=-1).item()
+        confidence = torch.max(probabilities).item()
+        
+        # Map class to label (0: Real, 1: Fake)
+        prediction = "FAKE" if predicted_class == 1 else "REAL"
+        
+        return {
+            "prediction": prediction,
+            "confidence": confidence,
+            "model": self.model_name,
+            "probabilities": {
+                "real": probabilities[0].item(),
+                "fake": probabilities[1].item() if probabilities.shape[0] > 1 else 1 - probabilities[0].item()
             }
+        }
+    
+    def _predict_windows(self, text: str) -> Dict[str, Any]:
+        try:
+            encodings = self.tokenizer(
+                text[:self.max_chars],
+                truncation=True,
+                max_length=512,
+                stride=self.window_overlap,
+                return_overflowing_tokens=True
+            )
+            total_windows = len(encodings["input_ids"])
+            indices = self._select_windows(total_windows, self.max_windows)
+            
+            # All windows of the document go through the model as one batch
+            features = [
+                {k: encodings[k][i] for k in encodings.keys() if k != "overflow_to_sample_mapping"}
+                for i in indices
+            ]
+            inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+            probabilities = self._forward(inputs)
+            
+            result = self._format_result(self._aggregate_windows(probabilities))
+            result["windows"] = {"scored": len(indices), "total": total_windows, "aggregation": self.aggregation}
+            return result
             
         except Exception as e:
-            logging.error(f"Error in prediction: {str(e)}")
+            logging.error(f"Error in long-document prediction: {str(e)}")
             return {
                 "prediction": "ERROR",
                 "confidence": 0.0,
                 "error": str(e)
             }
     
-    def batch_predict(self, texts: list) -> list:
-        results = []
-        for text in texts:
-            results.append(self.predict(text))
+    @staticmethod
+    def _select_windows(total: int, limit: int) -> List[int]:
+        # Beyond the limit, keep the first window (headline and lead) and spread the rest evenly
+        if total <= limit:
+            return list(range(total))
+        if limit == 1:
+            return [0]
+        step = (total - 1) / (limit - 1)
+        return sorted({round(i * step) for i in range(limit)})
+    
+    def _aggregate_windows(self, probabilities: torch.Tensor) -> torch.Tensor:
+        if self.aggregation == "mean" or probabilities.shape[0] == 1:
+            return probabilities.mean(dim=0)
+        if self.aggregation == "max":
+            # The document is as suspicious as its most suspicious window
+            return probabilities[torch.argmax(probabilities[:, -1])]
+        
+        # headline: the first window carries headline_weight, the rest share the remainder
+        weights = torch.full((probabilities.shape[0],), (1 - self.headline_weight) / (probabilities.shape[0] - 1))
+        weights[0] = self.headline_weight
+        return (probabilities * weights.unsqueeze(-1).to(probabilities.dtype)).sum(dim=0)
+    
+    def batch_predict(self, texts: list, batch_size: int = 16, max_tokens: int = 8192) -> list:
+        results = [None] * len(texts)
+        if not texts:
+            return results
+        
+        if self.long_document:
+            # Each document is already one bounded batch of windows
+            return [self._predict_windows(text) for text in texts]
+        
+        try:
+            # Tokenize everything in one call, padding is done per batch later
+            encodings = self.tokenizer(
+                [text[:self.max_chars] for text in texts],
+                truncation=True,
+                padding=False,
+                max_length=512
+            )
+        except Exception as e:
+            logging.error(f"Error tokenizing batch: {str(e)}")
+            return [{"prediction": "ERROR", "confidence": 0.0, "error": str(e)} for _ in texts]
+        
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        
+        for indices in self._length_buckets(lengths, batch_size, max_tokens):
+            features = [{k: encodings[k][i] for k in encodings.keys()} for i in indices]
+            try:
+                inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+                probabilities = self._forward(inputs)
+                
+                for row, i in enumerate(indices):
+                    results[i] = self._format_result(probabilities[row])
+            except Exception as e:
+                logging.error(f"Error in batch prediction: {str(e)}")
+                for i in indices:
+                    results[i] = {"prediction": "ERROR", "confidence": 0.0, "error": str(e)}
+        
         return results
+    
+    @staticmethod
+    def _length_buckets(lengths: List[int], batch_size: int, max_tokens: int) -> List[List[int]]:
+        # Sort by token length so each batch pads to a similar size, then cut
+        # batches when either the row limit or the padded token budget is hit
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches = []
+        current = []
+        for i in order:
+            padded_tokens = lengths[i] * (len(current) + 1)
+            if current and (len(current) >= batch_size or padded_tokens > max_tokens):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
 
 class MultiModelDetector:
-    def __init__(self):
+    def __init__(self, parallel: bool = False, intra_op_threads: int = None, backend: str = "torch",
+                 quantize: tuple = (), lazy: bool = False, early_exit_threshold: float = None,
+                 latency_alpha: float = 0.2, window_options: Dict[str, Any] = None, readiness: Readiness = None):
+        # quantize lists the members that should load their INT8 variant;
+        # window_options (long_document, max_windows, ...) apply to every member
+        window_options = window_options or {}
         self.models = {
-            "bert_news": HuggingFaceDetector("jy46604790/Fake-News-Bert-Detect"),
-            "roberta_news": HuggingFaceDetector("winterForestStump/Roberta-fake-news-detector")
+            "bert_news": HuggingFaceDetector(
+                "jy46604790/Fake-News-Bert-Detect", backend=backend, quantize="bert_news" in quantize, load=False,
+                **window_options
+            ),
+            "roberta_news": HuggingFaceDetector(
+                "winterForestStump/Roberta-fake-news-detector", backend=backend, quantize="roberta_news" in quantize,
+                load=False, **window_options
+            )
         }
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        # Every member load is recorded here, whichever caller ends up loading
+        self.readiness = readiness or Readiness()
+        self.readiness.expect(self.models)
+        
+        # With a threshold, members run cheapest first (by an EWMA of their
+        # per-text latency) and the rest are skipped once one is confident enough
+        self.early_exit_threshold = early_exit_threshold
+        self.latency_alpha = latency_alpha
+        self._stats_lock = threading.Lock()
+        self._latency = {}
+        self._stats = {"texts": 0, "early_exits": 0, "latency_saved": 0.0}
+        
+        # Parallel mode runs the members side by side on a dedicated pool and
+        # splits the intra-op thread budget so they don't oversubscribe cores
+        self.parallel = parallel
+        self.intra_op_threads = intra_op_threads
+        self.executor = None
+        self._executor_pid = None
+        if parallel:
+            self._create_executor()
+        else:
+            for model in self.models.values():
+                model.intra_op_threads = intra_op_threads
+        
+        # Lazy mode defers the weights until load_models() or the first prediction
+        if not lazy:
+            self.load_models()
+    
+    def _create_executor(self):
+        total_threads = self.intra_op_threads or torch.get_num_threads()
+        self.threads_per_model = max(1, total_threads // len(self.models))
+        # ONNX members don't go through torch, so they get their share directly
+        for model in self.models.values():
+            model.intra_op_threads = self.threads_per_model
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.models),
+            thread_name_prefix="ensemble-member",
+            initializer=torch.set_num_threads,
+            initargs=(self.threads_per_model,)
+        )
+        self._executor_pid = os.getpid()
+    
+    def set_intra_op_threads(self, threads: int):
+        """Re-split the thread budget and reopen ONNX sessions with their new share"""
+        self.intra_op_threads = threads
+        if self.executor is not None:
+            self._create_executor()
+        else:
+            for model in self.models.values():
+                model.intra_op_threads = threads
+        for model in self.models.values():
+            model.reopen_session()
+    
+    def load_models(self):
+        """Load every member at once on its own thread, recording state and timing in self.readiness"""
+        with self._load_lock:
+            if self._loaded:
+                return
+            with ThreadPoolExecutor(max_workers=len(self.models), thread_name_prefix="model-loader") as loader:
+                futures = [
+                    loader.submit(self.readiness.track, model_name, model.load_model)
+                    for model_name, model in self.models.items()
+                ]
+                for future in futures:
+                    future.result()
+            self._loaded = True
     
     def predict_ensemble(self, text: str) -> Dict[str, Any]:
-        results = {}
-        predictions = []
-        confidences = []
+        self.load_models()
+        if self._early_exit_enabled():
+            return self._predict_early_exit([text], lambda model, texts: [model.predict(texts[0])])[0]
         
-        for model_name, model in self.models.items():
-            try:
-                result = model.predict(text)
+        results = self._run_members(lambda model: model.predict(text))
+        
+        for model_name, result in results.items():
+            if isinstance(result, Exception):
+                logging.error(f"Error with model {model_name}: {str(result)}")
+                results[model_name] = {"prediction": "ERROR", "error": str(result)}
+        
+        return self._combine_results(results)
+    
+    def predict_ensemble_batch(self, texts: list, batch_size: int = 16, max_tokens: int = 8192) -> list:
+        self.load_models()
+        if self._early_exit_enabled():
+            return self._predict_early_exit(
+                texts, lambda model, pending: model.batch_predict(pending, batch_size=batch_size, max_tokens=max_tokens)
+            )
+        
+        per_text = [{} for _ in texts]
+        
+        # One batched pass per model instead of one pass per model per text
+        member_results = self._run_members(
+            lambda model: model.batch_predict(texts, batch_size=batch_size, max_tokens=max_tokens), count=len(texts)
+        )
+        
+        for model_name, model_results in member_results.items():
+            if isinstance(model_results, Exception):
+                logging.error(f"Error with model {model_name}: {str(model_results)}")
+                model_results = [{"prediction": "ERROR", "error": str(model_results)} for _ in texts]
+            
+            for results, result in zip(per_text, model_results):
                 results[model_name] = result
-                
-                if result["prediction"] != "ERROR":
-                    predictions.append(1 if result["prediction"] == "FAKE" else 0)
-                    confidences.append(result["confidence"])
+        
+        return [self._combine_results(results) for results in per_text]
+    
+    def _early_exit_enabled(self) -> bool:
+        # Parallel mode already pays for every member at once, so there is nothing to skip
+        return self.early_exit_threshold is not None and self.executor is None
+    
+    def _member_order(self) -> List[str]:
+        # Cheapest first; members without a latency estimate yet go first so they get measured
+        with self._stats_lock:
+            return sorted(self.models, key=lambda model_name: self._latency.get(model_name, 0.0))
+    
+    def _timed(self, model_name: str, call, count: int):
+        start = time.perf_counter()
+        output = call(self.models[model_name])
+        per_text = (time.perf_counter() - start) / max(count, 1)
+        
+        with self._stats_lock:
+            previous = self._latency.get(model_name)
+            self._latency[model_name] = per_text if previous is None else (
+                previous + self.latency_alpha * (per_text - previous)
+            )
+        return output
+    
+    def _predict_early_exit(self, texts: list, run) -> list:
+        # run(model, pending_texts) returns one result per pending text
+        per_text = [{} for _ in texts]
+        pending = list(range(len(texts)))
+        order = self._member_order()
+        
+        for model_name in order:
+            if not pending:
+                break
+            pending_texts = [texts[i] for i in pending]
+            try:
+                model_results = self._timed(model_name, lambda model: run(model, pending_texts), len(pending_texts))
             except Exception as e:
                 logging.error(f"Error with model {model_name}: {str(e)}")
-                results[model_name] = {"prediction": "ERROR", "error": str(e)}
+                model_results = [{"prediction": "ERROR", "error": str(e)} for _ in pending_texts]
+            
+            still_pending = []
+            for i, result in zip(pending, model_results):
+                per_text[i][model_name] = result
+                if result["prediction"] == "ERROR" or result["confidence"] < self.early_exit_threshold:
+                    still_pending.append(i)
+            pending = still_pending
+        
+        with self._stats_lock:
+            latency = dict(self._latency)
+        
+        combined = []
+        early_exits = 0
+        latency_saved = 0.0
+        for results in per_text:
+            skipped = [model_name for model_name in order if model_name not in results]
+            for model_name in skipped:
+                results[model_name] = {"prediction": "SKIPPED", "confidence": 0.0, "reason": "early_exit"}
+            if skipped:
+                early_exits += 1
+                latency_saved += sum(latency.get(model_name, 0.0) for model_name in skipped)
+            
+            # Keep individual_results in registration order regardless of run order
+            result = self._combine_results({model_name: results[model_name] for model_name in self.models})
+            result["early_exit"] = bool(skipped)
+            combined.append(result)
+        
+        with self._stats_lock:
+            self._stats["texts"] += len(texts)
+            self._stats["early_exits"] += early_exits
+            self._stats["latency_saved"] += latency_saved
+        return combined
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            texts = self._stats["texts"]
+            return {
+                "early_exit_threshold": self.early_exit_threshold,
+                "member_order": sorted(self.models, key=lambda model_name: self._latency.get(model_name, 0.0)),
+                "member_latency_ms": {name: latency * 1000.0 for name, latency in self._latency.items()},
+                "texts": texts,
+                "early_exits": self._stats["early_exits"],
+                "early_exit_rate": self._stats["early_exits"] / texts if texts else 0.0,
+                "estimated_latency_saved_ms": self._stats["latency_saved"] * 1000.0
+            }
+    
+    def _run_members(self, call, count: int = 1) -> Dict[str, Any]:
+        # Returns each member's output, or the exception it raised
+        results = {}
+        
+        # Pool threads do not survive fork; a forked worker builds its own pool
+        # sized from its own thread budget
+        if self.executor is not None and self._executor_pid != os.getpid():
+            self._create_executor()
+        
+        if self.executor is None:
+            for model_name in self.models:
+                try:
+                    results[model_name] = self._timed(model_name, call, count)
+                except Exception as e:
+                    results[model_name] = e
+            return results
+        
+        futures = {
+            model_name: self.executor.submit(self._timed, model_name, call, count)
+            for model_name in self.models
+        }
+        for model_name, future in futures.items():
+            try:
+                results[model_name] = future.result()
+            except Exception as e:
+                results[model_name] = e
+        return results
+    
+    def _combine_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        predictions = []
+        confidences = []
+        
+        for result in results.values():
+            if result["prediction"] not in ("ERROR", "SKIPPED"):
+                predictions.append(1 if result["prediction"] == "FAKE" else 0)
+                confidences.append(result["confidence"])
         
         if not predictions:
             return {
@@ -116,4 +562,4 @@ class MultiModelDetector:
             "weighted_score": weighted_pred,
             "individual_results": results,
             "method": "ensemble"
-        }
\ No newline at end of file
+        }
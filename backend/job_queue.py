@@ -0,0 +1,353 @@
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from database import DB_PATH, connect, get_connection, init_db, store_history
+
+
+# A worker that exits before it is ready (e.g. the models fail to load) is
+# restarted after a delay that doubles with every such failure, up to the cap
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 300.0
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def init_jobs_table(db_path: str = DB_PATH):
+    conn = connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            id TEXT PRIMARY KEY,
+            news_text TEXT NOT NULL,
+            status TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            timeout REAL NOT NULL,
+            result TEXT,
+            error TEXT,
+            worker_pid INTEGER,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analysis_jobs_queue
+        ON analysis_jobs (status, priority DESC, created_at)
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def _claim_job(conn):
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers can
+    # never claim the same queued row
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute('''
+            SELECT id, news_text FROM analysis_jobs
+            WHERE status = 'queued'
+            ORDER BY priority DESC, created_at
+            LIMIT 1
+        ''').fetchone()
+        if row:
+            conn.execute(
+                "UPDATE analysis_jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE id = ?",
+                (os.getpid(), time.time(), row[0])
+            )
+        conn.commit()
+        return row
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+def _finish_job(conn, job_id, news_text, result=None, error=None):
+    try:
+        cursor = conn.cursor()
+        # Only a job that is still ours: the supervisor may have timed it out meanwhile
+        cursor.execute('''
+            UPDATE analysis_jobs SET status = ?, result = ?, error = ?, finished_at = ?
+            WHERE id = ? AND status = 'running' AND worker_pid = ?
+        ''', ('done' if error is None else 'failed', json.dumps(result) if result is not None else None,
+              error, time.time(), job_id, os.getpid()))
+        if error is None and cursor.rowcount:
+            store_history(conn, [(news_text, result['prediction'], result['confidence'], None, result)])
+        conn.commit()
+    except Exception:
+        # Never leave the write lock held by a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+def _worker_main(db_path, poll_interval, ready):
+    # Each worker process loads the detectors once and then serves jobs until terminated
+    from settings import create_analyzer
+
+    logging.basicConfig(level=logging.INFO)
+    analyzer = create_analyzer()
+    analyzer.warm_up(background=False)
+    if not analyzer.readiness.is_ready():
+        raise SystemExit(f"Job worker {os.getpid()} failed to warm up: {analyzer.readiness.report()['components']}")
+    ready.set()
+    logging.info(f"Job worker {os.getpid()} ready")
+
+    # One connection for the worker's lifetime, with the shared WAL settings
+    conn = connect(db_path)
+
+    while True:
+        try:
+            job = _claim_job(conn)
+        except sqlite3.Error as e:
+            logging.error(f"Error claiming job: {str(e)}")
+            time.sleep(poll_interval)
+            continue
+
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        job_id, news_text = job
+        try:
+            result = analyzer.analyze(news_text)
+            _finish_job(conn, job_id, news_text, result=result)
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {str(e)}")
+            try:
+                _finish_job(conn, job_id, news_text, error=str(e))
+            except sqlite3.Error as e:
+                # The job stays running until the supervisor times it out
+                logging.error(f"Error recording failure of job {job_id}: {str(e)}")
+
+
+def _process_exists(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """Persistent priority queue of analyses served by a bounded pool of worker processes"""
+
+    def __init__(self, db_path: str = DB_PATH, workers: int = 2, default_timeout: float = 120,
+                 max_pending: int = 1000, poll_interval: float = 0.5):
+        self.db_path = db_path
+        self.workers = workers
+        self.default_timeout = default_timeout
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+
+        # spawn keeps workers free of the parent's threads and torch state
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = {}
+        self._ready = {}
+        self._lock = threading.Lock()
+        self._supervisor = None
+        self._owner_pid = None
+        self._started = False
+        self._stopping = threading.Event()
+        # Worker slots waiting to be refilled, and when the backoff allows it
+        self._missing = 0
+        self._failures = 0
+        self._respawn_at = 0.0
+
+        # Workers add finished jobs to the analysis history as well
+        init_db(self.db_path)
+        init_jobs_table(self.db_path)
+
+    def reserve(self, owner_pid: int):
+        """Record that the process owner_pid runs the workers, without starting any here.
+        Processes forked afterwards leave their jobs to those workers."""
+        with self._lock:
+            self._owner_pid = owner_pid
+
+    def start(self):
+        with self._lock:
+            if self._started or self._owner_pid not in (None, os.getpid()):
+                return
+            self._owner_pid = os.getpid()
+            self._started = True
+
+        # Work whose worker no longer exists goes back on the queue; jobs held
+        # by another process's live workers are left alone
+        with get_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, worker_pid FROM analysis_jobs WHERE status = 'running'")
+            orphaned = [(job_id,) for job_id, pid in cursor.fetchall() if not _process_exists(pid)]
+            cursor.executemany('''
+                UPDATE analysis_jobs SET status = 'queued', worker_pid = NULL, started_at = NULL
+                WHERE id = ? AND status = 'running'
+            ''', orphaned)
+            conn.commit()
+        if orphaned:
+            logging.info(f"Requeued {len(orphaned)} interrupted job(s)")
+
+        for _ in range(self.workers):
+            self._spawn_worker()
+
+        self._supervisor = threading.Thread(target=self._supervise, name="job-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the supervisor and terminate this process's workers; running jobs are requeued on the next start()"""
+        self._stopping.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=timeout)
+        with self._lock:
+            processes = list(self._processes.values())
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=timeout)
+
+    def submit(self, news_text: str, priority: int = 0, timeout: float = None) -> str:
+        # Servers that never called start() get their workers on the first job.
+        # A process forked after reserve() or start() leaves the jobs to its parent's workers
+        if self._owner_pid is None:
+            self.start()
+
+        job_id = uuid.uuid4().hex
+        with get_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM analysis_jobs WHERE status IN ('queued', 'running')")
+            if cursor.fetchone()[0] >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+
+            try:
+                cursor.execute('''
+                    INSERT INTO analysis_jobs (id, news_text, status, priority, timeout, created_at)
+                    VALUES (?, ?, 'queued', ?, ?, ?)
+                ''', (job_id, news_text, int(priority), float(timeout or self.default_timeout), time.time()))
+                conn.commit()
+            except Exception:
+                # The connection goes back to the pool, so no transaction may stay open
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with get_connection(self.db_path) as conn:
+            row = conn.execute('''
+                SELECT id, status, priority, timeout, result, error, created_at, started_at, finished_at
+                FROM analysis_jobs WHERE id = ?
+            ''', (job_id,)).fetchone()
+
+        if row is None:
+            return None
+        return {
+            'job_id': row[0],
+            'status': row[1],
+            'priority': row[2],
+            'timeout': row[3],
+            'result': json.loads(row[4]) if row[4] else None,
+            'error': row[5],
+            'created_at': row[6],
+            'started_at': row[7],
+            'finished_at': row[8]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with get_connection(self.db_path) as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status').fetchall())
+
+        # Worker processes can only be inspected from the process that started them
+        alive = None
+        if self._owner_pid == os.getpid():
+            with self._lock:
+                alive = sum(1 for process in self._processes.values() if process.is_alive())
+        return {'workers': self.workers, 'workers_alive': alive, 'jobs': counts}
+
+    def _spawn_worker(self):
+        ready = self._context.Event()
+        process = self._context.Process(
+            target=_worker_main, args=(self.db_path, self.poll_interval, ready), name="analysis-worker", daemon=True
+        )
+        process.start()
+        with self._lock:
+            self._processes[process.pid] = process
+            self._ready[process.pid] = ready
+
+    def _supervise(self):
+        # The supervisor polls often, so it keeps one connection open
+        conn = connect(self.db_path)
+        while not self._stopping.wait(self.poll_interval):
+            try:
+                self._expire_jobs(conn)
+                self._replace_dead_workers(conn)
+            except Exception as e:
+                logging.error(f"Job supervisor error: {str(e)}")
+                if conn.in_transaction:
+                    conn.rollback()
+
+    def _expire_jobs(self, conn):
+        # A job past its timeout is abandoned by killing its worker process,
+        # which is then replaced by a fresh one
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, worker_pid FROM analysis_jobs
+            WHERE status = 'running' AND started_at + timeout < ?
+        ''', (time.time(),))
+        expired = cursor.fetchall()
+
+        for job_id, pid in expired:
+            cursor.execute('''
+                UPDATE analysis_jobs SET status = 'timeout', error = 'Job exceeded its timeout', finished_at = ?
+                WHERE id = ? AND status = 'running'
+            ''', (time.time(), job_id))
+            with self._lock:
+                process = self._processes.get(pid)
+            if process is not None and process.is_alive():
+                logging.warning(f"Job {job_id} timed out, restarting worker {pid}")
+                process.terminate()
+        conn.commit()
+
+    def _replace_dead_workers(self, conn):
+        with self._lock:
+            dead = [pid for pid, process in self._processes.items() if not process.is_alive()]
+            crashed_early = 0
+            for pid in dead:
+                self._processes.pop(pid).join(timeout=0)
+                if not self._ready.pop(pid).is_set():
+                    crashed_early += 1
+
+        if dead:
+            self._fail_jobs_of(conn, dead)
+            self._missing += len(dead)
+            if crashed_early:
+                self._failures += crashed_early
+                delay = min(RESTART_BACKOFF * 2 ** min(self._failures - 1, 16), MAX_RESTART_BACKOFF)
+                self._respawn_at = time.monotonic() + delay
+                logging.error(f"{crashed_early} job worker(s) exited before becoming ready, restarting in {delay:.1f}s")
+            else:
+                # Workers that got as far as serving jobs reset the backoff
+                self._failures = 0
+
+        if self._missing and time.monotonic() >= self._respawn_at:
+            for _ in range(self._missing):
+                self._spawn_worker()
+            self._missing = 0
+
+    def _fail_jobs_of(self, conn, dead):
+        # Jobs held by a crashed worker are failed rather than retried forever
+        conn.executemany('''
+            UPDATE analysis_jobs SET status = 'failed', error = 'Worker process exited', finished_at = ?
+            WHERE status = 'running' AND worker_pid = ?
+        ''', [(time.time(), pid) for pid in dead])
+        conn.commit()
@@ -1,4 +1,3 @@
-import re
 import nltk
 import pandas as pd
 import numpy as np
@@ -9,33 +8,123 @@ import sqlite3
 from datetime import datetime
 import os
 from real_time_checker import RealTimeNewsChecker
-from news_explainer import NewsExplainer
-from huggingface_detector import HuggingFaceDetector, MultiModelDetector
+from news_explainer import NewsExplainer, check_nltk_resources
+from huggingface_detector import HuggingFaceDetector, MultiModelDetector, PARITY_TEXTS
+from batch_scheduler import MicroBatchScheduler
+from readiness import Readiness
+from classical_detector import preprocess_text
+from result_cache import text_key
+from collections import OrderedDict
 import logging
+import threading
+
+def batch_item_error(text):
+    """Why a batch item cannot be analyzed, or None; an exception stands for an item that failed to parse"""
+    if isinstance(text, Exception):
+        return str(text)
+    if not isinstance(text, str):
+        return f'Text must be a string, not {type(text).__name__}'
+    if not text:
+        return 'No text provided'
+    return None
 
 class NewsAnalyzer:
-    def __init__(self):
+    def __init__(self, micro_batching=False, max_batch_size=16, max_wait_ms=5.0, parallel_ensemble=False,
+                 inference_backend='torch', quantize_models=(), result_cache=None, http_client=None,
+                 search_cache=None, article_cache=None, lazy_models=False, download_nltk=False, cascade=None,
+                 early_exit_threshold=None, window_options=None, intra_op_threads=None):
         self.trusted_sources = [
             'reuters.com', 'ap.org', 'bbc.com', 'cnn.com', 'npr.org',
             'kompas.com', 'detik.com', 'tempo.co', 'antara.id', 'liputan6.com'
         ]
-        self.real_time_checker = RealTimeNewsChecker()
-        self.news_explainer = NewsExplainer()
+        self.real_time_checker = RealTimeNewsChecker(http_client=http_client, search_cache=search_cache)
+        self.news_explainer = NewsExplainer(http_client=http_client, article_cache=article_cache)
+        self.result_cache = result_cache
+        # Optional CascadeDetector that answers clear-cut texts without the transformers
+        self.cascade = cascade
+        self.download_nltk = download_nltk
+        
+        # The detector records its own member loads, also when a request triggers them
+        self.readiness = Readiness()
+        self.hf_detector = MultiModelDetector(
+            parallel=parallel_ensemble, intra_op_threads=intra_op_threads, backend=inference_backend,
+            quantize=tuple(quantize_models), lazy=True,
+            early_exit_threshold=early_exit_threshold, window_options=window_options, readiness=self.readiness
+        )
+        self.readiness.expect(['nltk'])
+        self._warm_up_lock = threading.Lock()
+        self._warm_up_thread = None
+        
+        # Lazy mode leaves loading to warm_up(), so constructing the analyzer stays cheap
+        if not lazy_models:
+            try:
+                logging.info("Initializing Hugging Face models...")
+                self.load_components()
+                logging.info("Hugging Face models loaded successfully")
+            except Exception as e:
+                logging.error(f"Failed to load Hugging Face models: {str(e)}")
+                raise Exception(f"Cannot initialize Hugging Face models: {str(e)}")
+        
+        # Optionally coalesce concurrent requests into shared batched passes
+        self.hf_scheduler = None
+        if micro_batching:
+            self.hf_scheduler = MicroBatchScheduler(
+                self.hf_detector, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+            )
+    
+    def load_components(self):
+        # Both transformers load side by side; NLTK data is only looked up locally
+        self.hf_detector.load_models()
         
-        # Initialize Hugging Face models
+        missing = self.readiness.track('nltk', lambda: check_nltk_resources(download=self.download_nltk))
+        if missing:
+            logging.warning(f"NLTK resources not installed, explanations will use simple fallbacks: {', '.join(missing)}")
+            self.readiness.set('nltk', 'degraded', missing=missing)
+    
+    def warm_up(self, background=True):
+        """Load everything and run warm-up inferences once per analyzer; background=False waits for it"""
+        with self._warm_up_lock:
+            if self._warm_up_thread is None:
+                self.readiness.expect(['warmup_inference'])
+                self._warm_up_thread = threading.Thread(target=self._warm_up, name="analyzer-warmup", daemon=True)
+                self._warm_up_thread.start()
+        if not background:
+            self._warm_up_thread.join()
+        return self._warm_up_thread
+    
+    def _warm_up(self):
         try:
-            logging.info("Initializing Hugging Face models...")
-            self.hf_detector = MultiModelDetector()
-            logging.info("Hugging Face models loaded successfully")
+            self.load_components()
+            # The first passes pay for kernel selection and allocator growth
+            self.readiness.track('warmup_inference', lambda: (
+                self.hf_detector.predict_ensemble(PARITY_TEXTS[0]),
+                self.hf_detector.predict_ensemble_batch(PARITY_TEXTS)
+            ))
         except Exception as e:
-            logging.error(f"Failed to load Hugging Face models: {str(e)}")
-            raise Exception(f"Cannot initialize Hugging Face models: {str(e)}")
+            logging.error(f"Warm-up failed: {str(e)}")
+    
+    def predict_transformers(self, text):
+        if self.hf_scheduler is not None:
+            return self.hf_scheduler.predict(text)
+        return self.hf_detector.predict_ensemble(text)
+    
+    def predict_models(self, text):
+        if self.cascade is not None:
+            return self.cascade.predict(text, self.predict_transformers)
+        result = self.predict_transformers(text)
+        result['decision_tier'] = 'transformer'
+        return result
+    
+    def predict_models_batch(self, texts):
+        if self.cascade is not None:
+            return self.cascade.predict_batch(texts, self.hf_detector.predict_ensemble_batch)
+        results = self.hf_detector.predict_ensemble_batch(texts)
+        for result in results:
+            result['decision_tier'] = 'transformer'
+        return results
     
     def preprocess_text(self, text):
-        text = text.lower()
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return preprocess_text(text)
     
     def extract_features(self, text):
         features = {}
@@ -71,12 +160,138 @@ class NewsAnalyzer:
         
         return trusted_mentions / len(self.trusted_sources) if self.trusted_sources else 0
     
-    def analyze(self, text):
+    def analyze(self, text, refresh=False):
+        result = None
+        for event, payload in self.analyze_stream(text, refresh=refresh):
+            if event == 'result':
+                result = payload
+        return result
+    
+    def analyze_stream(self, text, refresh=False):
+        """Yield (stage, payload) events as each analysis stage finishes, ending with ('result', full result)"""
+        # refresh skips the cache lookup but still stores the fresh result
+        if self.result_cache is not None and not refresh:
+            cached = self.result_cache.get(text)
+            if cached is not None:
+                print("Serving cached analysis...")
+                cached['cached'] = True
+                yield from self.stage_events(cached)
+                yield 'result', cached
+                return
+        
+        result = None
+        for event, payload in self._analysis_stages(text):
+            if event == 'result':
+                result = payload
+            else:
+                yield event, payload
+        
+        # An incomplete verification is not cached, so the next request retries the sources
+        if self.result_cache is not None and not result['verification_incomplete']:
+            self.result_cache.put(text, result)
+        
+        result['cached'] = False
+        yield 'result', result
+    
+    @staticmethod
+    def stage_events(result):
+        """Rebuild the per-stage events from a finished result"""
+        yield 'prediction', {
+            'prediction': result['ml_prediction'],
+            'confidence': result['ml_confidence'],
+            'decision_tier': result.get('decision_tier'),
+            'individual_predictions': result['individual_predictions'],
+            'huggingface_details': result['huggingface_details']
+        }
+        yield 'verification', result['real_time_verification']
+        yield 'related_news', result['related_authentic_news']
+        yield 'explanation', {
+            'comprehensive_explanation': result['comprehensive_explanation'],
+            'user_explanation': result['user_explanation']
+        }
+    
+    def analyze_batch(self, texts, verify=False, chunk_size=32, dedupe_window=4096):
+        """Analyze an iterable of texts chunk by chunk, yielding (index, text, result, duplicate_of) as results are ready.
+        Without verify only the batched transformer stage runs; duplicate_of is the index of the
+        first identical text when a result is reused."""
+        # Recently seen texts, bounded so memory stays flat on very large batches
+        seen = OrderedDict()
+        chunk = []
+        
+        for index, text in enumerate(texts):
+            chunk.append((index, text))
+            if len(chunk) >= chunk_size:
+                yield from self._analyze_chunk(chunk, verify, seen, dedupe_window)
+                chunk = []
+        
+        if chunk:
+            yield from self._analyze_chunk(chunk, verify, seen, dedupe_window)
+    
+    def _analyze_chunk(self, chunk, verify, seen, dedupe_window):
+        pending = OrderedDict()
+        for index, text in chunk:
+            error = batch_item_error(text)
+            if error:
+                yield index, text, {'prediction': 'ERROR', 'confidence': 0.0, 'error': error}, None
+                continue
+            key = text_key(text)
+            if key in seen:
+                first_index, result = seen[key]
+                seen.move_to_end(key)
+                yield index, text, result, first_index
+            else:
+                pending.setdefault(key, []).append((index, text))
+        
+        def remember(key, result):
+            first_index = pending[key][0][0]
+            seen[key] = (first_index, result)
+            while len(seen) > dedupe_window:
+                seen.popitem(last=False)
+            for index, text in pending[key]:
+                yield index, text, result, None if index == first_index else first_index
+        
+        # Full analyses already in the result cache skip the models entirely
+        if verify and self.result_cache is not None:
+            for key in list(pending):
+                cached = self.result_cache.get(pending[key][0][1])
+                if cached is not None:
+                    cached['cached'] = True
+                    yield from remember(key, cached)
+                    del pending[key]
+        
+        if not pending:
+            return
+        
+        keys = list(pending)
+        unique_texts = [pending[key][0][1] for key in keys]
+        hf_results = self.predict_models_batch(unique_texts)
+        
+        for key, text, hf_result in zip(keys, unique_texts, hf_results):
+            if not verify:
+                yield from remember(key, hf_result)
+                continue
+            
+            try:
+                result = None
+                for event, payload in self._analysis_stages(text, hf_result=hf_result):
+                    if event == 'result':
+                        result = payload
+                if self.result_cache is not None:
+                    self.result_cache.put(text, result)
+                result['cached'] = False
+            except Exception as e:
+                print(f"Error analyzing batch item: {str(e)}")
+                result = {'prediction': 'ERROR', 'confidence': 0.0, 'error': str(e)}
+            
+            yield from remember(key, result)
+    
+    def _analysis_stages(self, text, hf_result=None):
         print("Starting analysis...")
         
         # Get Hugging Face model predictions
         print("Getting Hugging Face model predictions...")
-        hf_result = self.hf_detector.predict_ensemble(text)
+        if hf_result is None:
+            hf_result = self.predict_models(text)
         
         if hf_result['prediction'] == 'ERROR':
             raise Exception(f"Hugging Face prediction failed: {hf_result.get('error', 'Unknown error')}")
@@ -95,36 +310,31 @@ class NewsAnalyzer:
             }
         }
         
+        yield 'prediction', {
+            'prediction': ml_prediction,
+            'confidence': float(avg_confidence),
+            'decision_tier': hf_result['decision_tier'],
+            'individual_predictions': predictions,
+            'huggingface_details': hf_result
+        }
+        
         # Check trusted sources (old method)
         trusted_score = self.check_trusted_sources(text)
         
-        # Real-time verification with trusted sources
-        print("Performing real-time verification...")
-        verification_result = self.real_time_checker.verify_with_trusted_sources(text)
+        # Real-time verification and related authentic news share one search pass
+        print("Performing real-time verification and searching for related authentic news...")
+        verification_result, related_news = self.real_time_checker.search_news(text, max_articles=5)
         
-        # Get related authentic news articles
-        print("Searching for related authentic news...")
-        related_news = self.real_time_checker.get_related_authentic_news(text, max_articles=5)
-        
-        # Generate comprehensive explanation
-        print("Generating comprehensive explanation...")
-        explanation = None
-        user_explanation = None
-        
-        try:
-            if related_news and related_news['related_articles']:
-                explanation = self.news_explainer.summarize_topic(text, related_news['related_articles'])
-                user_explanation = self.news_explainer.generate_user_friendly_explanation(
-                    explanation, final_prediction, final_confidence
-                )
-        except Exception as e:
-            print(f"Error generating explanation: {str(e)}")
-            # Continue without explanation rather than failing completely
+        yield 'verification', verification_result
+        yield 'related_news', related_news
         
         # PRIORITIZE REAL-TIME VERIFICATION over ML models
         final_prediction = ml_prediction
         final_confidence = avg_confidence
         verification_weight = 0.0
+        # Sources that missed the search deadline may still have had coverage,
+        # so only evidence actually found may move the verdict
+        verification_incomplete = verification_result.get('verification_incomplete', False)
         
         # Handle suspicious geopolitical claims
         if verification_result.get('claim_type') == 'suspicious_geopolitical_claim':
@@ -147,6 +357,10 @@ class NewsAnalyzer:
             verification_weight = 0.6
             print(f"MODERATE CONFIDENCE: Found {verification_result['total_sources_found']} trusted source(s)")
         
+        # Without every trusted source, neither the fact-check nor the no-evidence rule applies
+        elif verification_incomplete:
+            print(f"INCOMPLETE VERIFICATION: {', '.join(verification_result['timed_out_sources'])} timed out, keeping model prediction")
+        
         # Evidence from fact-checkers (even without trusted news sources)
         elif len(verification_result['fact_checks']) > 0:
             # Fact-checkers found - likely debunking false claims
@@ -176,12 +390,34 @@ class NewsAnalyzer:
                 verification_weight = max(verification_weight, 0.5)
                 print(f"AUTHENTIC NEWS FOUND: {related_news['total_found']} related articles from trusted sources")
         
+        # Generate comprehensive explanation once the final verdict is known
+        print("Generating comprehensive explanation...")
+        explanation = None
+        user_explanation = None
+        
+        try:
+            if related_news and related_news['related_articles']:
+                explanation = self.news_explainer.summarize_topic(text, related_news['related_articles'])
+                user_explanation = self.news_explainer.generate_user_friendly_explanation(
+                    explanation, final_prediction, final_confidence
+                )
+        except Exception as e:
+            print(f"Error generating explanation: {str(e)}")
+            # Continue without explanation rather than failing completely
+        
+        yield 'explanation', {
+            'comprehensive_explanation': explanation,
+            'user_explanation': user_explanation
+        }
+        
         # Extract additional features
         features = self.extract_features(text)
         
         # Determine decision basis
         decision_basis = "Hugging Face Transformer Models"
-        if verification_weight >= 0.6:
+        if verification_incomplete and verification_weight == 0.0:
+            decision_basis = "Hugging Face Transformer Models (Incomplete Source Verification)"
+        elif verification_weight >= 0.6:
             decision_basis = "Real-time Verification from Trusted Sources"
         elif verification_weight >= 0.4:
             decision_basis = "Fact-checker Verification"
@@ -193,8 +429,10 @@ class NewsAnalyzer:
             'confidence': float(final_confidence),
             'decision_basis': decision_basis,
             'verification_weight': float(verification_weight),
+            'verification_incomplete': verification_incomplete,
             'ml_prediction': ml_prediction,
             'ml_confidence': float(avg_confidence),
+            'decision_tier': hf_result['decision_tier'],
             'trusted_sources_score': float(trusted_score),
             'real_time_verification': verification_result,
             'related_authentic_news': related_news,
@@ -210,4 +448,4 @@ class NewsAnalyzer:
             }
         }
         
-        return result
\ No newline at end of file
+        yield 'result', result
@@ -1,76 +1,166 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 import re
+import time
 from textblob import TextBlob
 import nltk
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from http_client import get_http_client, RateLimitTimeout
+from html_parsing import get_selector_set, ARTICLE_CONTENT_SELECTORS
 
-# Download required NLTK data
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('averaged_perceptron_tagger', quiet=True)
-except:
-    pass
+UNWANTED_ARTICLE_TAGS = ('script', 'style', 'nav', 'header', 'footer', 'aside', 'advertisement')
+
+# NLTK data used by TextBlob's tokenizer and tagger, by download name and data path
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger'
+}
+
+def check_nltk_resources(download=False):
+    """Return the NLTK resources that are not installed, downloading them first only when asked.
+    Without them explanations fall back to simple word and sentence splitting."""
+    missing = []
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if download and nltk.download(name, quiet=True):
+                continue
+            missing.append(name)
+    return missing
 
 class NewsExplainer:
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+    def __init__(self, http_client=None, article_cache=None, max_workers=6, extraction_budget=8.0,
+                 fast_parsing=True):
+        self.http = http_client or get_http_client()
+        self.article_cache = article_cache
+        
+        # Article pages are fetched concurrently under one overall time budget
+        self.max_workers = max_workers
+        self._create_executor()
+        self.extraction_budget = extraction_budget
+        self.fast_parsing = fast_parsing
         
     def extract_article_content(self, url):
         """Extract main content from a news article"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            cached = self.article_cache.get(url) if self.article_cache else None
+            if cached and self.article_cache.is_fresh(cached):
+                self.article_cache.record_fresh_hit()
+                return cached['content']
+            
+            # Revalidate with ETag/Last-Modified when we already hold the text
+            headers = self.article_cache.conditional_headers(cached) if cached else {}
+            response = self.http.get(url, timeout=10, headers=headers)
+            
+            if response.status_code == 304 and cached:
+                self.article_cache.mark_revalidated(url)
+                return cached['content']
+            
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Remove unwanted elements
-                for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'advertisement']):
-                    element.decompose()
+                content_text = self.parse_article_content(response.content)
                 
-                # Common selectors for article content
-                content_selectors = [
-                    '.article-content', '.post-content', '.entry-content',
-                    '.content', '.text', '.body', 'article p',
-                    '.detail-content', '.news-content'
-                ]
+                # Only the extracted text is cached, never the raw HTML
+                if self.article_cache and content_text:
+                    self.article_cache.put(
+                        url, content_text,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
                 
-                content_text = ""
-                for selector in content_selectors:
-                    elements = soup.select(selector)
-                    for element in elements:
-                        text = element.get_text().strip()
-                        if len(text) > 100:  # Only substantial content
-                            content_text += text + "\n"
-                
-                # If no specific content found, try all paragraphs
-                if not content_text:
-                    paragraphs = soup.find_all('p')
-                    for p in paragraphs:
-                        text = p.get_text().strip()
-                        if len(text) > 50:
-                            content_text += text + "\n"
-                
-                return content_text[:2000]  # Limit content length
+                return content_text
                 
+        except RateLimitTimeout:
+            # Reported by the caller as a skipped source, not as an empty article
+            raise
         except Exception as e:
             print(f"Error extracting content from {url}: {str(e)}")
             return ""
         
         return ""
     
+    def parse_article_content(self, html):
+        """Pull the main article text out of a fetched page"""
+        # Unwanted sections are kept as parse roots so anything inside them is
+        # still removed below, exactly as with a full parse
+        selector_set = get_selector_set(ARTICLE_CONTENT_SELECTORS + ('p',), UNWANTED_ARTICLE_TAGS)
+        soup = selector_set.parse(html, fast=self.fast_parsing)
+        
+        # Remove unwanted elements
+        for element in soup(list(UNWANTED_ARTICLE_TAGS)):
+            element.decompose()
+        
+        # Common selectors for article content
+        content_text = ""
+        for index in range(len(ARTICLE_CONTENT_SELECTORS)):
+            elements = selector_set.select(soup, index)
+            for element in elements:
+                text = element.get_text().strip()
+                if len(text) > 100:  # Only substantial content
+                    content_text += text + "\n"
+        
+        # If no specific content found, try all paragraphs
+        if not content_text:
+            paragraphs = soup.find_all('p')
+            for p in paragraphs:
+                text = p.get_text().strip()
+                if len(text) > 50:
+                    content_text += text + "\n"
+        
+        return content_text[:2000]  # Limit content length
+    
+    def _create_executor(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="article-extract")
+        self._executor_pid = os.getpid()
+    
+    def _extract_before(self, deadline, url):
+        # Rate limiter waits give up at the extraction deadline instead of holding the thread
+        with self.http.deadline(deadline):
+            return self.extract_article_content(url)
+    
     def summarize_topic(self, original_text, related_articles):
         """Create a comprehensive explanation of the news topic"""
         
         # Extract key information from original text
         original_summary = self.extract_key_points(original_text)
         
-        # Get content from top related articles
+        # Get content from top related articles, all at once under one deadline
+        top_articles = related_articles[:3]  # Top 3 most relevant
+        print(f"Extracting content from {', '.join(article['source'] for article in top_articles)}...")
+        # Pool threads do not survive fork; a forked worker builds its own pool
+        if self._executor_pid != os.getpid():
+            self._create_executor()
+        deadline = time.monotonic() + self.extraction_budget
+        futures = [
+            self.executor.submit(self._extract_before, deadline, article['link']) for article in top_articles
+        ]
+        wait(futures, timeout=self.extraction_budget)
+        
         article_contents = []
-        for article in related_articles[:3]:  # Top 3 most relevant
-            print(f"Extracting content from {article['source']}...")
-            content = self.extract_article_content(article['link'])
+        skipped_sources = []
+        for article, future in zip(top_articles, futures):
+            if not future.done():
+                # Whatever misses the budget is left out of the explanation
+                future.cancel()
+                skipped_sources.append({
+                    'source': article['source'],
+                    'title': article['title'],
+                    'link': article['link'],
+                    'reason': 'timeout'
+                })
+                continue
+            
+            try:
+                content = future.result()
+            except RateLimitTimeout:
+                # The domain's rate limit would have kept it waiting past the budget
+                skipped_sources.append({
+                    'source': article['source'],
+                    'title': article['title'],
+                    'link': article['link'],
+                    'reason': 'rate_limited'
+                })
+                continue
             if content:
                 article_contents.append({
                     'source': article['source'],
@@ -79,8 +169,12 @@ class NewsExplainer:
                     'link': article['link']
                 })
         
+        if skipped_sources:
+            print(f"Extraction budget reached, skipped: {', '.join(s['source'] for s in skipped_sources)}")
+        
         # Generate comprehensive explanation
         explanation = self.generate_explanation(original_text, original_summary, article_contents)
+        explanation['skipped_sources'] = skipped_sources
         
         return explanation
     
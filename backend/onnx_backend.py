@@ -0,0 +1,91 @@
+import os
+import re
+import logging
+import threading
+import torch
+import numpy as np
+from typing import Dict, List
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+ONNX_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'onnx')
+
+# torch.onnx.export keeps global tracer state, so members loading in parallel
+# take turns exporting
+_export_lock = threading.Lock()
+
+
+class _LogitsOnly(torch.nn.Module):
+    # Exposes positional inputs and a plain logits tensor so the exported
+    # graph has stable input/output names
+    def __init__(self, model, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *args):
+        return self.model(**dict(zip(self.input_names, args))).logits
+
+
+def onnx_model_path(model_name: str, cache_dir: str = None) -> str:
+    safe_name = re.sub(r'[^\w.-]', '__', model_name)
+    return os.path.join(cache_dir or ONNX_CACHE_DIR, f"{safe_name}.onnx")
+
+
+def export_to_onnx(model, tokenizer, path: str, opset_version: int = 14):
+    if ort is None:
+        raise ImportError("onnxruntime is not installed")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    dummy = tokenizer("Export sample text", return_tensors="pt")
+    input_names = list(dummy.keys())
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+
+    # The wrapper moves the caller's model to CPU in place, so it goes back
+    # to its own device afterwards
+    device = next(model.parameters()).device
+    wrapper = _LogitsOnly(model, input_names).to('cpu').eval()
+
+    # Export to a temporary file first so concurrent workers never load a
+    # half-written graph from the cache
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with _export_lock, torch.no_grad():
+            torch.onnx.export(
+                wrapper,
+                tuple(dummy[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=['logits'],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset_version,
+                do_constant_folding=True
+            )
+    finally:
+        model.to(device)
+    os.replace(tmp_path, path)
+    logging.info(f"Exported ONNX graph to {path}")
+
+
+class OnnxSession:
+    def __init__(self, path: str, intra_op_threads: int = None):
+        if ort is None:
+            raise ImportError("onnxruntime is not installed")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def run(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {name: inputs[name].astype(np.int64) for name in self.input_names if name in inputs}
+        return self.session.run(['logits'], feed)[0]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import sqlite3
+import sys
+
+from huggingface_detector import HuggingFaceDetector, PARITY_TEXTS
+
+ENSEMBLE_MODELS = [
+    "jy46604790/Fake-News-Bert-Detect",
+    "winterForestStump/Roberta-fake-news-detector"
+]
+
+
+def load_history_texts(db_path, limit):
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT news_text FROM analysis_history ORDER BY id DESC LIMIT ?', (limit,))
+        texts = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return texts
+    except sqlite3.Error as e:
+        print(f"Could not read analysis history: {str(e)}")
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ONNX Runtime outputs against the torch backend")
+    parser.add_argument("--db", default="hoax_detection.db")
+    parser.add_argument("--limit", type=int, default=50, help="Number of stored texts to include")
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    parser.add_argument("--onnx-cache-dir", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    texts = PARITY_TEXTS + load_history_texts(args.db, args.limit)
+    failed = False
+
+    for model_name in ENSEMBLE_MODELS:
+        detector = HuggingFaceDetector(
+            model_name,
+            backend="onnx",
+            onnx_cache_dir=args.onnx_cache_dir,
+            parity_tolerance=args.tolerance
+        )
+        report = detector.check_parity(texts)
+        status = "PASS" if report["passed"] else "FAIL"
+        print(f"{status} {model_name}: {report['texts']} texts, "
+              f"max |Δp| = {report['max_abs_diff']:.6f}, "
+              f"label agreement = {report['label_agreement']:.1%}")
+        failed = failed or not report["passed"]
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+
+from database import DB_PATH, prune_history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete old analysis history and unreferenced stored results")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--days", type=float, default=float(os.environ.get('HISTORY_RETENTION_DAYS', '90')),
+                        help="Keep history newer than this many days")
+    parser.add_argument("--vacuum", action="store_true", help="Rebuild the database file afterwards to return space")
+    args = parser.parse_args()
+
+    before = os.path.getsize(args.db)
+    counts = prune_history(args.db, retention_days=args.days, vacuum=args.vacuum)
+    after = os.path.getsize(args.db)
+
+    print(f"Deleted {counts['history_deleted']} history row(s) and {counts['results_deleted']} stored result(s)")
+    print(f"Database size: {before / 1024 / 1024:.1f} MB -> {after / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+ENSEMBLE_MODELS = {
+    "bert_news": "jy46604790/Fake-News-Bert-Detect",
+    "roberta_news": "winterForestStump/Roberta-fake-news-detector"
+}
+
+
+def resident_memory_mb():
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        # Linux fallback: second field of statm is resident pages
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def load_history_texts(db_path, limit):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('SELECT news_text FROM analysis_history ORDER BY id DESC LIMIT ?', (limit,))
+    texts = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    return texts
+
+
+def profile_variant(model_name, quantize, texts, threads):
+    # Runs in a fresh process so resident memory reflects one variant only
+    import torch
+    from huggingface_detector import HuggingFaceDetector
+
+    torch.set_num_threads(threads)
+    baseline = resident_memory_mb()
+    detector = HuggingFaceDetector(model_name, quantize=quantize)
+    loaded = resident_memory_mb()
+
+    detector.predict(texts[0])
+
+    predictions = []
+    fake_probabilities = []
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        result = detector.predict(text)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        predictions.append(result["prediction"])
+        fake_probabilities.append(result.get("probabilities", {}).get("fake", 0.0))
+
+    return {
+        "predictions": predictions,
+        "fake_probabilities": fake_probabilities,
+        "latencies_ms": latencies,
+        "model_memory_mb": loaded - baseline,
+        "resident_memory_mb": resident_memory_mb()
+    }
+
+
+def run_isolated(model_name, quantize, texts, threads):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(profile_variant, (model_name, quantize, texts, threads))
+
+
+def compare(fp32, int8):
+    agreement = np.mean([a == b for a, b in zip(fp32["predictions"], int8["predictions"])])
+    drift = np.abs(np.array(fp32["fake_probabilities"]) - np.array(int8["fake_probabilities"]))
+
+    def latency(profile):
+        return {
+            "p50_ms": float(np.percentile(profile["latencies_ms"], 50)),
+            "p95_ms": float(np.percentile(profile["latencies_ms"], 95))
+        }
+
+    return {
+        "texts": len(fp32["predictions"]),
+        "agreement_rate": float(agreement),
+        "confidence_drift_mean": float(np.mean(drift)),
+        "confidence_drift_max": float(np.max(drift)),
+        "fp32": {**latency(fp32), "model_memory_mb": fp32["model_memory_mb"], "resident_memory_mb": fp32["resident_memory_mb"]},
+        "int8": {**latency(int8), "model_memory_mb": int8["model_memory_mb"], "resident_memory_mb": int8["resident_memory_mb"]}
+    }
+
+
+def print_report(name, report):
+    fp32, int8 = report["fp32"], report["int8"]
+    print(f"\n=== {name} ({report['texts']} texts) ===")
+    print(f"Agreement rate:   {report['agreement_rate']:.1%}")
+    print(f"Confidence drift: mean {report['confidence_drift_mean']:.4f}, max {report['confidence_drift_max']:.4f}")
+    print(f"{'':8}{'p50 ms':>10}{'p95 ms':>10}{'model MB':>10}{'RSS MB':>10}")
+    for label, stats in (("fp32", fp32), ("int8", int8)):
+        print(f"{label:8}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+              f"{stats['model_memory_mb']:>10.0f}{stats['resident_memory_mb']:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and dynamic INT8 variants of the ensemble models")
+    parser.add_argument("--db", default="hoax_detection.db")
+    parser.add_argument("--limit", type=int, default=200, help="Number of stored texts to score")
+    parser.add_argument("--models", default=",".join(ENSEMBLE_MODELS), help="Comma-separated ensemble members")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    texts = load_history_texts(args.db, args.limit)
+    if not texts:
+        print("No texts found in analysis_history")
+        return
+
+    reports = {}
+    for name in [m for m in args.models.split(",") if m]:
+        model_name = ENSEMBLE_MODELS[name]
+        fp32 = run_isolated(model_name, False, texts, args.threads)
+        int8 = run_isolated(model_name, True, texts, args.threads)
+        reports[name] = compare(fp32, int8)
+        print_report(name, reports[name])
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+
+class Readiness:
+    """Load state and timings of the components a process needs before it can serve.
+
+    Each component is 'pending', 'loading', 'ready', 'degraded' (usable with
+    reduced functionality) or 'failed'. The process is ready once every
+    expected component is ready or degraded.
+    """
+
+    def __init__(self, components: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._created_at = time.time()
+        self._components = {}
+        self.expect(components)
+
+    def expect(self, components: Iterable[str]):
+        with self._lock:
+            for name in components:
+                self._components.setdefault(name, {'state': 'pending'})
+
+    def set(self, name: str, state: str, **info):
+        with self._lock:
+            self._components.setdefault(name, {}).update(state=state, **info)
+
+    def track(self, name: str, load: Callable[[], Any]) -> Any:
+        """Run load() and record its outcome and duration under name"""
+        self.set(name, 'loading', started_at=time.time())
+        start = time.perf_counter()
+        try:
+            result = load()
+        except Exception as e:
+            self.set(name, 'failed', error=str(e), duration_ms=(time.perf_counter() - start) * 1000.0)
+            raise
+        self.set(name, 'ready', duration_ms=(time.perf_counter() - start) * 1000.0)
+        return result
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(c['state'] in ('ready', 'degraded') for c in self._components.values())
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(info) for name, info in self._components.items()}
+        return {
+            'ready': all(c['state'] in ('ready', 'degraded') for c in components.values()),
+            'uptime_s': time.time() - self._created_at,
+            'components': components
+        }
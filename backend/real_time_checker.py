@@ -1,13 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 import re
-from urllib.parse import quote
 import time
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 import json
+from http_client import get_http_client, RateLimitTimeout
+from html_parsing import get_selector_set, SEARCH_RESULT_SELECTORS, FACT_CHECK_SELECTORS
 
 class RealTimeNewsChecker:
-    def __init__(self):
+    def __init__(self, max_workers=8, search_deadline=15.0, http_client=None, search_cache=None,
+                 fast_parsing=True):
         self.trusted_sources = {
             'international': [
                 {'name': 'Reuters', 'search_url': 'https://www.reuters.com/site-search/?query={}', 'domain': 'reuters.com'},
@@ -29,9 +32,71 @@ class RealTimeNewsChecker:
             {'name': 'Cek Fakta', 'search_url': 'https://cekfakta.com/?s={}', 'domain': 'cekfakta.com'}
         ]
         
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        # Each source's selectors are compiled once here. A source may carry its
+        # own 'selectors' tuple; none does yet, so all share the generic sets
+        self.selector_sets = {
+            source['name']: get_selector_set(tuple(source.get('selectors', SEARCH_RESULT_SELECTORS)))
+            for sources in self.trusted_sources.values() for source in sources
+        }
+        self.selector_sets.update({
+            fact_checker['name']: get_selector_set(tuple(fact_checker.get('selectors', FACT_CHECK_SELECTORS)))
+            for fact_checker in self.fact_checkers
+        })
+        
+        # Pooled sessions and per-domain rate limiting replace fixed sleeps
+        self.http = http_client or get_http_client()
+        
+        # Searches for all analyses share one bounded pool; each analysis gets
+        # a global deadline instead of summing per-site timeouts
+        self.max_workers = max_workers
+        self._create_executor()
+        self.search_deadline = search_deadline
+        
+        # Optional cache of parsed search results shared across processes
+        self.search_cache = search_cache
+        
+        # Fast parsing uses the startup-selected parser and only builds the
+        # subtrees the selectors can match; disable to parse whole pages with html.parser
+        self.fast_parsing = fast_parsing
+    
+    def _create_executor(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="source-search")
+        self._executor_pid = os.getpid()
+    
+    def run_searches(self, tasks, on_result):
+        """Run (name, function, args) searches concurrently, passing each result to on_result as it completes.
+        Returns the names of searches still unfinished at the deadline."""
+        # Pool threads do not survive fork; a forked worker builds its own pool
+        if self._executor_pid != os.getpid():
+            self._create_executor()
+        
+        # Rate limiter waits inside the searches give up at the same deadline
+        deadline = time.monotonic() + self.search_deadline
+        futures = {
+            self.executor.submit(self._call_before, deadline, func, args): name
+            for name, func, args in tasks
         }
+        pending = set(futures)
+        
+        try:
+            for future in as_completed(futures, timeout=self.search_deadline):
+                pending.discard(future)
+                try:
+                    on_result(futures[future], future.result())
+                except RateLimitTimeout:
+                    # Left out of the results like a search still running at the deadline
+                    print(f"Rate limit wait for {futures[future]} would pass the search deadline")
+                except Exception as e:
+                    print(f"Error searching {futures[future]}: {str(e)}")
+        except FutureTimeoutError:
+            for future in pending:
+                future.cancel()
+        
+        return [futures[future] for future in futures if future in pending]
+    
+    def _call_before(self, deadline, func, args):
+        with self.http.deadline(deadline):
+            return func(*args)
     
     def extract_keywords(self, text):
         """Extract key terms and detect claim type from news text"""
@@ -79,59 +144,64 @@ class RealTimeNewsChecker:
             search_query = ' '.join(keywords)
             search_url = source['search_url'].format(quote(search_query))
             
-            response = requests.get(search_url, headers=self.headers, timeout=10)
+            response = self.http.get(search_url, timeout=10)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Generic search for article links and titles
-                articles = []
-                
-                # Common selectors for news articles
-                selectors = [
-                    'article', '.article', '.news-item', '.search-result',
-                    'h2 a', 'h3 a', '.title a', '.headline a'
-                ]
-                
-                for selector in selectors:
-                    elements = soup.select(selector)[:max_results]
-                    for element in elements:
-                        if element.name == 'a':
-                            title = element.get_text().strip()
-                            link = element.get('href', '')
-                        else:
-                            link_elem = element.find('a')
-                            if link_elem:
-                                title = link_elem.get_text().strip()
-                                link = link_elem.get('href', '')
-                            else:
-                                continue
-                        
-                        if title and link and len(title) > 10:  # Filter out too short titles
-                            # Make link absolute if relative
-                            if link.startswith('/'):
-                                link = f"https://{source['domain']}{link}"
-                            elif not link.startswith('http'):
-                                link = f"https://{source['domain']}/{link}"
-                            
-                            # Try to get article summary/excerpt
-                            excerpt = self.get_article_excerpt(element)
-                            
-                            articles.append({
-                                'title': title,
-                                'link': link,
-                                'source': source['name'],
-                                'domain': source['domain'],
-                                'excerpt': excerpt
-                            })
-                
-                return articles[:max_results]
+                return self.parse_search_results(source, response.content, max_results)
                 
+        except RateLimitTimeout:
+            # Not an empty result: the search never ran, so it must not be cached
+            # and the source counts as timed out
+            raise
         except Exception as e:
             print(f"Error searching {source['name']}: {str(e)}")
             return []
         
         return []
     
+    def parse_search_results(self, source, html, max_results=3):
+        """Extract article titles, links and excerpts from a search results page"""
+        selector_set = self.selector_sets.get(source['name']) or get_selector_set(
+            tuple(source.get('selectors', SEARCH_RESULT_SELECTORS))
+        )
+        soup = selector_set.parse(html, fast=self.fast_parsing)
+        
+        # Generic search for article links and titles
+        articles = []
+        
+        for index in range(len(selector_set.selectors)):
+            elements = selector_set.select(soup, index, limit=max_results)
+            for element in elements:
+                if element.name == 'a':
+                    title = element.get_text().strip()
+                    link = element.get('href', '')
+                else:
+                    link_elem = element.find('a')
+                    if link_elem:
+                        title = link_elem.get_text().strip()
+                        link = link_elem.get('href', '')
+                    else:
+                        continue
+                
+                if title and link and len(title) > 10:  # Filter out too short titles
+                    # Make link absolute if relative
+                    if link.startswith('/'):
+                        link = f"https://{source['domain']}{link}"
+                    elif not link.startswith('http'):
+                        link = f"https://{source['domain']}/{link}"
+                    
+                    # Try to get article summary/excerpt
+                    excerpt = self.get_article_excerpt(element)
+                    
+                    articles.append({
+                        'title': title,
+                        'link': link,
+                        'source': source['name'],
+                        'domain': source['domain'],
+                        'excerpt': excerpt
+                    })
+        
+        return articles[:max_results]
+    
     def get_article_excerpt(self, element):
         """Try to extract article excerpt/summary"""
         try:
@@ -158,48 +228,165 @@ class RealTimeNewsChecker:
             search_query = ' '.join(keywords)
             search_url = fact_checker['search_url'].format(quote(search_query))
             
-            response = requests.get(search_url, headers=self.headers, timeout=10)
+            response = self.http.get(search_url, timeout=10)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for fact-check results
-                fact_checks = []
-                
-                # Common selectors for fact-check articles
-                selectors = [
-                    '.fact-check', '.rating', '.verdict', 
-                    'article', '.search-result', '.post'
-                ]
-                
-                for selector in selectors[:2]:  # Limit to first 2 results
-                    elements = soup.select(selector)
-                    for element in elements:
-                        link_elem = element.find('a')
-                        if link_elem:
-                            title = link_elem.get_text().strip()
-                            link = link_elem.get('href', '')
-                            
-                            if title and link:
-                                if link.startswith('/'):
-                                    link = f"https://{fact_checker['domain']}{link}"
-                                
-                                fact_checks.append({
-                                    'title': title,
-                                    'link': link,
-                                    'source': fact_checker['name']
-                                })
-                
-                return fact_checks[:2]
+                return self.parse_fact_checks(fact_checker, response.content)
                 
+        except RateLimitTimeout:
+            # Not an empty result: the search never ran, so it must not be cached
+            # and the source counts as timed out
+            raise
         except Exception as e:
             print(f"Error searching {fact_checker['name']}: {str(e)}")
             return []
         
         return []
     
-    def verify_with_trusted_sources(self, text):
-        """Main function to verify news against trusted sources"""
+    def parse_fact_checks(self, fact_checker, html):
+        """Extract fact-check titles and links from a fact-checker search page"""
+        selector_set = self.selector_sets.get(fact_checker['name']) or get_selector_set(
+            tuple(fact_checker.get('selectors', FACT_CHECK_SELECTORS))
+        )
+        soup = selector_set.parse(html, fast=self.fast_parsing)
+        
+        # Look for fact-check results
+        fact_checks = []
+        
+        for index in range(len(selector_set.selectors)):
+            elements = selector_set.select(soup, index)
+            for element in elements:
+                link_elem = element.find('a')
+                if link_elem:
+                    title = link_elem.get_text().strip()
+                    link = link_elem.get('href', '')
+                    
+                    if title and link:
+                        if link.startswith('/'):
+                            link = f"https://{fact_checker['domain']}{link}"
+                        
+                        fact_checks.append({
+                            'title': title,
+                            'link': link,
+                            'source': fact_checker['name']
+                        })
+        
+        return fact_checks[:2]  # Limit to first 2 results
+    
+    def verification_searches(self, keyword_result):
+        """Searches needed for verification as (kind, site, keywords, max_results)"""
+        keywords = keyword_result['keywords']
+        
+        # For suspicious claims, prioritize fact-checkers
+        if keyword_result['claim_type'] == 'suspicious_geopolitical_claim':
+            # Search all fact-checkers, plus a limited search of trusted sources with specific terms
+            return (
+                [('fact_check', fact_checker, keywords, 2) for fact_checker in self.fact_checkers] +
+                [('trusted', source, ['indonesia myanmar relations', 'sejarah indonesia'], 1)
+                 for source in self.trusted_sources['indonesia'][:2]]
+            )
+        
+        # Normal search for regular news
+        all_sources = self.trusted_sources['indonesia'] + self.trusted_sources['international'][:1]
+        return (
+            [('trusted', source, keywords, 2) for source in all_sources[:3]] +
+            [('fact_check', fact_checker, keywords, 2) for fact_checker in self.fact_checkers[:2]]
+        )
+    
+    def related_news_searches(self, keyword_result):
+        """Searches needed for related news as (kind, site, keywords, max_results)"""
+        # For suspicious claims, don't provide "related" articles that might confuse
+        if keyword_result['claim_type'] == 'suspicious_geopolitical_claim':
+            return []
+        
+        # Prioritize Indonesian sources for better relevance, limit to 4 sources
+        priority_sources = self.trusted_sources['indonesia'] + self.trusted_sources['international'][:2]
+        return [('trusted', source, keyword_result['keywords'], 3) for source in priority_sources[:4]]
+    
+    @staticmethod
+    def search_key(kind, site, keywords):
+        return (kind, site['name'], ' '.join(keywords))
+    
+    def execute_searches(self, searches):
+        """Fetch each distinct (source, query) once and return {search_key: results}.
+        Searches that did not finish before the deadline are missing from the result."""
+        plan = {}
+        for kind, site, keywords, max_results in searches:
+            key = self.search_key(kind, site, keywords)
+            if key in plan:
+                # Several consumers want this search: fetch enough for the largest
+                plan[key] = (kind, site, keywords, max(plan[key][3], max_results))
+            else:
+                plan[key] = (kind, site, keywords, max_results)
+        
+        if not plan:
+            return {}
+        
+        print(f"Searching {', '.join(site['name'] for _, site, _, _ in plan.values())}...")
+        search_tasks = [(key, self.cached_search, args) for key, args in plan.items()]
+        
+        # Results are stored as each search completes
+        search_results = {}
+        def store(key, results):
+            search_results[key] = results
+        
+        timed_out = self.run_searches(search_tasks, store)
+        if timed_out:
+            print(f"Search deadline reached, skipped: {', '.join(name for _, name, _ in timed_out)}")
+        
+        return search_results
+    
+    def cached_search(self, kind, site, keywords, max_results):
+        """Run one search, going through the search cache when one is configured"""
+        if kind == 'trusted':
+            fetch = lambda: self.search_trusted_source(site, keywords, max_results)
+        else:
+            fetch = lambda: self.search_fact_checker(site, keywords)
+        
+        if self.search_cache is None:
+            return fetch()
+        
+        cache_key = f"{kind}|{site['name']}|{' '.join(keywords)}|{max_results}"
+        return self.search_cache.get_or_fetch(site['name'], cache_key, fetch)
+    
+    def collect_results(self, searches, search_results):
+        """Pick each consumer's slice out of the shared results, plus the sources that timed out"""
+        collected = {'trusted': [], 'fact_check': []}
+        timed_out_sources = []
+        
+        for kind, site, keywords, max_results in searches:
+            key = self.search_key(kind, site, keywords)
+            if key not in search_results:
+                timed_out_sources.append(site['name'])
+                continue
+            # Copy so one consumer's annotations don't leak into the other's results
+            collected[kind].extend(dict(item) for item in search_results[key][:max_results])
+        
+        return collected['trusted'], collected['fact_check'], timed_out_sources
+    
+    def search_news(self, text, max_articles=5):
+        """Run one shared search pass and build both verification and related news from it"""
         keyword_result = self.extract_keywords(text)
+        if not keyword_result['keywords']:
+            return (
+                self.verify_with_trusted_sources(text, keyword_result=keyword_result),
+                self.get_related_authentic_news(text, max_articles, keyword_result=keyword_result)
+            )
+        
+        searches = self.verification_searches(keyword_result) + self.related_news_searches(keyword_result)
+        search_results = self.execute_searches(searches)
+        
+        verification = self.verify_with_trusted_sources(
+            text, keyword_result=keyword_result, search_results=search_results
+        )
+        related = self.get_related_authentic_news(
+            text, max_articles, keyword_result=keyword_result, search_results=search_results
+        )
+        return verification, related
+    
+    def verify_with_trusted_sources(self, text, keyword_result=None, search_results=None):
+        """Main function to verify news against trusted sources"""
+        if keyword_result is None:
+            keyword_result = self.extract_keywords(text)
         keywords = keyword_result['keywords']
         
         if not keywords:
@@ -215,43 +402,14 @@ class RealTimeNewsChecker:
         print(f"Searching with keywords: {keywords}")
         print(f"Claim type: {keyword_result['claim_type']}")
         
-        trusted_articles = []
-        fact_checks = []
-        
-        # For suspicious claims, prioritize fact-checkers
         if keyword_result['claim_type'] == 'suspicious_geopolitical_claim':
             print("PRIORITIZING FACT-CHECKERS for suspicious geopolitical claim")
-            
-            # Search fact-checkers first and more thoroughly
-            for fact_checker in self.fact_checkers:
-                print(f"Searching {fact_checker['name']}...")
-                checks = self.search_fact_checker(fact_checker, keywords)
-                fact_checks.extend(checks)
-                time.sleep(1)
-            
-            # Limited search of trusted sources with specific terms
-            for source in self.trusted_sources['indonesia'][:2]:
-                print(f"Searching {source['name']} for factual information...")
-                articles = self.search_trusted_source(source, ['indonesia myanmar relations', 'sejarah indonesia'], max_results=1)
-                trusted_articles.extend(articles)
-                time.sleep(1)
         
-        else:
-            # Normal search for regular news
-            all_sources = self.trusted_sources['indonesia'] + self.trusted_sources['international'][:1]
-            
-            for source in all_sources[:3]:
-                print(f"Searching {source['name']}...")
-                articles = self.search_trusted_source(source, keywords, max_results=2)
-                trusted_articles.extend(articles)
-                time.sleep(1)
-            
-            # Search fact-checkers
-            for fact_checker in self.fact_checkers[:2]:
-                print(f"Searching {fact_checker['name']}...")
-                checks = self.search_fact_checker(fact_checker, keywords)
-                fact_checks.extend(checks)
-                time.sleep(1)
+        searches = self.verification_searches(keyword_result)
+        if search_results is None:
+            search_results = self.execute_searches(searches)
+        
+        trusted_articles, fact_checks, timed_out_sources = self.collect_results(searches, search_results)
         
         # Calculate verification score with claim type consideration
         total_sources = len(trusted_articles)
@@ -276,12 +434,17 @@ class RealTimeNewsChecker:
             'claim_type': keyword_result['claim_type'],
             'is_question': keyword_result.get('is_question', False),
             'total_sources_found': total_sources,
+            'timed_out_sources': timed_out_sources,
+            # Missing sources are unknown, not evidence that nothing was found
+            'verification_incomplete': bool(timed_out_sources),
             'message': f'Ditemukan {total_sources} artikel dari sumber terpercaya dan {fact_check_count} fact-check'
+            + (f' (verifikasi belum lengkap: {", ".join(timed_out_sources)} melewati batas waktu)' if timed_out_sources else '')
         }
     
-    def get_related_authentic_news(self, text, max_articles=5):
+    def get_related_authentic_news(self, text, max_articles=5, keyword_result=None, search_results=None):
         """Get related authentic news articles from trusted sources"""
-        keyword_result = self.extract_keywords(text)
+        if keyword_result is None:
+            keyword_result = self.extract_keywords(text)
         keywords = keyword_result['keywords']
         
         if not keywords:
@@ -301,22 +464,15 @@ class RealTimeNewsChecker:
         
         print(f"Searching for related authentic news with keywords: {keywords}")
         
-        all_articles = []
+        searches = self.related_news_searches(keyword_result)
+        if search_results is None:
+            search_results = self.execute_searches(searches)
         
-        # Prioritize Indonesian sources for better relevance
-        priority_sources = self.trusted_sources['indonesia'] + self.trusted_sources['international'][:2]
+        all_articles, _, timed_out_sources = self.collect_results(searches, search_results)
         
-        for source in priority_sources[:4]:  # Limit to 4 sources
-            print(f"Searching {source['name']} for related news...")
-            articles = self.search_trusted_source(source, keywords, max_results=3)
-            
-            # Add relevance score based on keyword matches
-            for article in articles:
-                relevance_score = self.calculate_relevance(article['title'], keywords)
-                article['relevance_score'] = relevance_score
-                
-            all_articles.extend(articles)
-            time.sleep(0.5)  # Be respectful to servers
+        # Add relevance score based on keyword matches
+        for article in all_articles:
+            article['relevance_score'] = self.calculate_relevance(article['title'], keywords)
         
         # Sort by relevance and remove duplicates
         seen_titles = set()
@@ -332,6 +488,7 @@ class RealTimeNewsChecker:
             'related_articles': unique_articles[:max_articles],
             'keywords_used': keywords,
             'total_found': len(unique_articles),
+            'timed_out_sources': timed_out_sources,
             'message': f'Ditemukan {len(unique_articles)} berita terkait dari sumber terpercaya'
         }
     
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+CACHE_DB_PATH = 'cache.db'
+
+
+def normalize_text(text: str) -> str:
+    # Case is kept on purpose: capitalization feeds both the transformers
+    # and the caps_ratio feature, so it changes the result
+    text = unicodedata.normalize('NFKC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache of analysis results keyed by a hash of the normalized text"""
+
+    def __init__(self, db_path: str = CACHE_DB_PATH, ttl: float = 3600, max_entries: int = 1024,
+                 max_bytes: int = 64 * 1024 * 1024, persistent: bool = True):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persistent = persistent
+
+        # key -> (expires_at, serialized result)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._puts = 0
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+        if self.persistent:
+            self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_created_at ON result_cache (created_at)')
+        conn.commit()
+        conn.close()
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        key = text_key(text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    return json.loads(payload)
+                self._drop(key)
+                self._expirations += 1
+
+        if self.persistent:
+            row = self._read_disk(key, now)
+            if row is not None:
+                payload, created_at = row
+                with self._lock:
+                    self._disk_hits += 1
+                    self._store_memory(key, payload, created_at + self.ttl)
+                return json.loads(payload)
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, text: str, result: Dict[str, Any]):
+        key = text_key(text)
+        now = time.time()
+        payload = json.dumps(result)
+
+        with self._lock:
+            self._store_memory(key, payload, now + self.ttl)
+            self._puts += 1
+            purge = self._puts % 100 == 0
+
+        if self.persistent:
+            self._write_disk(key, payload, now, purge)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            return {
+                'memory_hits': self._memory_hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': (self._memory_hits + self._disk_hits) / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'ttl': self.ttl
+            }
+
+    def _store_memory(self, key, payload, expires_at):
+        if key in self._memory:
+            self._drop(key)
+        if len(payload) > self.max_bytes:
+            return
+
+        self._memory[key] = (expires_at, payload)
+        self._memory_bytes += len(payload)
+
+        # Evict least recently used entries until both limits hold
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop(oldest)
+            self._evictions += 1
+
+    def _drop(self, key):
+        _, payload = self._memory.pop(key)
+        self._memory_bytes -= len(payload)
+
+    def _read_disk(self, key, now):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT result, created_at FROM result_cache WHERE key = ? AND created_at > ?',
+                (key, now - self.ttl)
+            )
+            row = cursor.fetchone()
+            conn.close()
+            return row
+        except sqlite3.Error as e:
+            logging.error(f"Error reading result cache: {str(e)}")
+            return None
+
+    def _write_disk(self, key, payload, now, purge):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT OR REPLACE INTO result_cache (key, result, created_at) VALUES (?, ?, ?)',
+                (key, payload, now)
+            )
+            if purge:
+                cursor.execute('DELETE FROM result_cache WHERE created_at <= ?', (now - self.ttl,))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Error writing result cache: {str(e)}")
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+CACHE_DB_PATH = 'cache.db'
+
+
+class SearchCache:
+    """Disk-backed cache of parsed search results shared by all worker processes.
+
+    Entries younger than the source's TTL are served as fresh. Entries that are
+    past the TTL but still inside the stale window are served immediately while
+    a background refresh fetches a new copy (stale-while-revalidate).
+    """
+
+    def __init__(self, db_path: str = CACHE_DB_PATH, default_ttl: float = 600, source_ttls: Dict[str, float] = None,
+                 stale_ttl: float = 3600, empty_ttl: float = 60, refresh_workers: int = 2):
+        self.db_path = db_path
+        self.default_ttl = default_ttl
+        self.source_ttls = source_ttls or {}
+        self.stale_ttl = stale_ttl
+        # Empty result lists are often transient failures, so they expire sooner
+        self.empty_ttl = empty_ttl
+
+        self.refresh_workers = refresh_workers
+        self._refresh_executor = None
+        self._executor_pid = None
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._writes = 0
+
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                results TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_cache_fetched_at ON search_cache (fetched_at)')
+        conn.commit()
+        conn.close()
+
+    def ttl_for(self, source: str, results: List[Any]) -> float:
+        ttl = self.source_ttls.get(source, self.default_ttl)
+        return min(ttl, self.empty_ttl) if not results else ttl
+
+    def get_or_fetch(self, source: str, key: str, fetch: Callable[[], List[Any]]) -> List[Any]:
+        row = self._read(key)
+        now = time.time()
+
+        if row is not None:
+            results, fetched_at = row
+            age = now - fetched_at
+            ttl = self.ttl_for(source, results)
+
+            if age < ttl:
+                self._count(source, 'fresh_hits')
+                return results
+
+            if age < ttl + self.stale_ttl:
+                self._count(source, 'stale_hits')
+                self._schedule_refresh(source, key, fetch)
+                return results
+
+        self._count(source, 'misses')
+        results = fetch()
+        self._write(source, key, results)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            report = {}
+            for source, counts in self._stats.items():
+                lookups = counts.get('fresh_hits', 0) + counts.get('stale_hits', 0) + counts.get('misses', 0)
+                hits = counts.get('fresh_hits', 0) + counts.get('stale_hits', 0)
+                report[source] = {**counts, 'hit_rate': hits / lookups if lookups else 0.0}
+            return report
+
+    def _schedule_refresh(self, source, key, fetch):
+        with self._lock:
+            # Pool threads do not survive fork: a forked worker starts its own
+            # pool, and refreshes the parent had in flight are not ours to wait for
+            if self._executor_pid != os.getpid():
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers, thread_name_prefix="search-refresh"
+                )
+                self._executor_pid = os.getpid()
+                self._refreshing = set()
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._write(source, key, fetch())
+                self._count(source, 'refreshes')
+            except Exception as e:
+                logging.error(f"Error refreshing search cache for {source}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(refresh)
+
+    def _max_age(self) -> float:
+        # Past this no source can serve an entry, not even as stale
+        return max([self.default_ttl, *self.source_ttls.values()]) + self.stale_ttl
+
+    def _count(self, source, name):
+        with self._lock:
+            counts = self._stats.setdefault(source, {})
+            counts[name] = counts.get(name, 0) + 1
+
+    def _read(self, key):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            cursor.execute('SELECT results, fetched_at FROM search_cache WHERE key = ?', (key,))
+            row = cursor.fetchone()
+            conn.close()
+            return (json.loads(row[0]), row[1]) if row else None
+        except sqlite3.Error as e:
+            logging.error(f"Error reading search cache: {str(e)}")
+            return None
+
+    def _write(self, source, key, results):
+        now = time.time()
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % 100 == 0
+
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT OR REPLACE INTO search_cache (key, source, results, fetched_at) VALUES (?, ?, ?, ?)',
+                (key, source, json.dumps(results), now)
+            )
+            if purge:
+                cursor.execute('DELETE FROM search_cache WHERE fetched_at <= ?', (now - self._max_age(),))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Error writing search cache: {str(e)}")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+# Workers that die this soon after starting are restarted with a delay
+MIN_WORKER_UPTIME = 5.0
+
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(application, sock, host, port, threads):
+    # Runs in a forked child: the model weights are shared with the master
+    # copy-on-write, only the thread budget and server are per worker
+    import torch
+    from werkzeug.serving import make_server
+
+    torch.set_num_threads(threads)
+    # onnxruntime sessions are not fork-safe: the worker opens its own, with its thread budget
+    application.analyzer.hf_detector.set_intra_op_threads(threads)
+    server = make_server(host, port, application.app, threaded=True, fd=sock.fileno())
+
+    def shutdown(signum, frame):
+        # shutdown() waits for serve_forever to return, so it cannot run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"Worker {os.getpid()} serving with {threads} intra-op thread(s)")
+    server.serve_forever()
+    application.history_writer.flush()
+
+
+def spawn_worker(application, sock, host, port, threads):
+    pid = os.fork()
+    if pid:
+        return pid
+
+    code = 0
+    try:
+        run_worker(application, sock, host, port, threads)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        # Skip the master's atexit handlers and inherited cleanup
+        os._exit(code)
+
+
+def spawn_job_queue(application):
+    # The job queue's supervisor thread, its database connection and the job
+    # worker processes live in a child of their own, so the master never holds
+    # them when it forks web workers
+    pid = os.fork()
+    if pid:
+        return pid
+
+    code = 0
+    try:
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+        # A restarted job queue process inherits its predecessor's pid as the owner
+        application.job_queue.reserve(os.getpid())
+        application.job_queue.start()
+        stopping.wait()
+        application.job_queue.stop()
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def private_memory_mb(pid):
+    # Pages this worker does not share with the master (Linux only)
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        private_kb = sum(int(fields[name].split()[0]) for name in ("Private_Clean", "Private_Dirty"))
+        return private_kb / 1024
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers that share the model weights")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "5000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", "2")))
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch/onnxruntime intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--backlog", type=int, default=128)
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Load and warm up on a single intra-op thread, so the master never starts
+    # an OpenMP pool that the forked workers would inherit in a broken state
+    import torch
+    torch.set_num_threads(1)
+    os.environ.setdefault("HF_LAZY_LOAD", "1")
+    # The same for onnxruntime: single-threaded sessions start no intra-op pool.
+    # Only the master's analyzer sees this, not the job workers spawned later
+    configured_threads = os.environ.get("HF_INTRA_OP_THREADS")
+    os.environ["HF_INTRA_OP_THREADS"] = "1"
+
+    import app as application
+
+    if configured_threads is None:
+        del os.environ["HF_INTRA_OP_THREADS"]
+    else:
+        os.environ["HF_INTRA_OP_THREADS"] = configured_threads
+
+    application.analyzer.warm_up(background=False)
+    if not application.analyzer.readiness.is_ready():
+        raise SystemExit(f"Warm-up failed: {application.analyzer.readiness.report()['components']}")
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+
+    # Objects that exist now are never scanned by the workers' garbage
+    # collector, which would otherwise touch (and copy) their pages
+    gc.collect()
+    gc.freeze()
+
+    # Web workers forked after reserve() leave jobs to the job queue process
+    # instead of starting pools of their own
+    job_queue_pid = spawn_job_queue(application)
+    application.job_queue.reserve(job_queue_pid)
+
+    workers = {}
+    for _ in range(args.workers):
+        pid = spawn_worker(application, sock, args.host, args.port, threads)
+        workers[pid] = time.monotonic()
+    print(f"Master {os.getpid()} started {args.workers} worker(s) on {args.host}:{args.port}")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+
+    reported = set()
+    while not stopping.is_set():
+        stopping.wait(0.5)
+        if not stopping.is_set() and os.waitpid(job_queue_pid, os.WNOHANG)[0]:
+            print(f"Job queue process {job_queue_pid} exited, restarting")
+            time.sleep(1.0)
+            job_queue_pid = spawn_job_queue(application)
+            application.job_queue.reserve(job_queue_pid)
+
+        for pid, started in list(workers.items()):
+            uptime = time.monotonic() - started
+            if pid not in reported and uptime > MIN_WORKER_UPTIME:
+                reported.add(pid)
+                memory = private_memory_mb(pid)
+                if memory is not None:
+                    print(f"Worker {pid} private memory: {memory:.1f} MB")
+
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if not done or stopping.is_set():
+                continue
+
+            del workers[pid]
+            print(f"Worker {pid} exited with status {status}, restarting")
+            if uptime < MIN_WORKER_UPTIME:
+                time.sleep(1.0)
+            new_pid = spawn_worker(application, sock, args.host, args.port, threads)
+            workers[new_pid] = time.monotonic()
+
+    print("Shutting down workers")
+    workers[job_queue_pid] = time.monotonic()
+    for pid in workers:
+        os.kill(pid, signal.SIGTERM)
+
+    deadline = time.monotonic() + args.graceful_timeout
+    while workers and time.monotonic() < deadline:
+        for pid in list(workers):
+            if os.waitpid(pid, os.WNOHANG)[0]:
+                del workers[pid]
+        time.sleep(0.1)
+
+    for pid in workers:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    main()
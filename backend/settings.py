@@ -0,0 +1,68 @@
+import os
+from news_analyzer import NewsAnalyzer
+from result_cache import ResultCache
+from http_client import HttpClient
+from search_cache import SearchCache
+from article_cache import ArticleCache
+from classical_detector import ClassicalDetector, CascadeDetector
+
+def create_analyzer():
+    """Build a NewsAnalyzer configured from environment variables"""
+    return NewsAnalyzer(
+        micro_batching=os.environ.get('HF_MICRO_BATCHING', '1') == '1',
+        max_batch_size=int(os.environ.get('HF_BATCH_MAX_SIZE', '16')),
+        max_wait_ms=float(os.environ.get('HF_BATCH_MAX_WAIT_MS', '5')),
+        parallel_ensemble=os.environ.get('HF_PARALLEL_ENSEMBLE', '0') == '1',
+        inference_backend=os.environ.get('HF_BACKEND', 'torch'),
+        # Unset uses every core (split between members in parallel mode)
+        intra_op_threads=int(os.environ['HF_INTRA_OP_THREADS']) if os.environ.get('HF_INTRA_OP_THREADS') else None,
+        quantize_models=[name for name in os.environ.get('HF_QUANTIZE', '').split(',') if name],
+        lazy_models=os.environ.get('HF_LAZY_LOAD', '1') == '1',
+        # Long-document mode scores overlapping token windows instead of the first 512 tokens
+        window_options={
+            'long_document': os.environ.get('HF_LONG_DOCUMENT', '0') == '1',
+            'max_chars': int(os.environ.get('HF_MAX_CHARS', '50000')),
+            'window_overlap': int(os.environ.get('HF_WINDOW_OVERLAP', '128')),
+            'max_windows': int(os.environ.get('HF_MAX_WINDOWS', '8')),
+            'aggregation': os.environ.get('HF_WINDOW_AGGREGATION', 'max')
+        },
+        # e.g. HF_EARLY_EXIT_THRESHOLD=0.98; unset runs every ensemble member
+        early_exit_threshold=float(os.environ['HF_EARLY_EXIT_THRESHOLD']) if os.environ.get('HF_EARLY_EXIT_THRESHOLD') else None,
+        download_nltk=os.environ.get('NLTK_DOWNLOAD', '0') == '1',
+        # e.g. CASCADE_BAND="0.1,0.9": classical fake probabilities inside the band go to the transformers
+        cascade=CascadeDetector(
+            ClassicalDetector(),
+            uncertainty_band=tuple(float(x) for x in os.environ.get('CASCADE_BAND', '0.1,0.9').split(','))
+        ) if os.environ.get('CASCADE_ENABLED', '0') == '1' else None,
+        result_cache=ResultCache(
+            db_path=os.environ.get('RESULT_CACHE_DB', 'cache.db'),
+            ttl=float(os.environ.get('RESULT_CACHE_TTL', '3600')),
+            max_entries=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '1024')),
+            max_bytes=int(os.environ.get('RESULT_CACHE_MAX_MB', '64')) * 1024 * 1024
+        ),
+        http_client=HttpClient(
+            pool_maxsize=int(os.environ.get('HTTP_POOL_SIZE', '16')),
+            retries=int(os.environ.get('HTTP_RETRIES', '2')),
+            rate=float(os.environ.get('HTTP_DOMAIN_RATE', '1.0')),
+            burst=int(os.environ.get('HTTP_DOMAIN_BURST', '2')),
+            # Rate limits are shared by every web and job worker through this database,
+            # kept apart from cache.db so token updates don't take the caches' write lock
+            db_path=os.environ.get('HTTP_RATE_LIMIT_DB', 'rate_limits.db')
+        ),
+        search_cache=SearchCache(
+            db_path=os.environ.get('SEARCH_CACHE_DB', 'cache.db'),
+            default_ttl=float(os.environ.get('SEARCH_CACHE_TTL', '600')),
+            # e.g. SEARCH_CACHE_SOURCE_TTLS="Kompas=300,Snopes=3600"
+            source_ttls={
+                name: float(ttl) for name, ttl in
+                (item.split('=', 1) for item in os.environ.get('SEARCH_CACHE_SOURCE_TTLS', '').split(',') if '=' in item)
+            },
+            stale_ttl=float(os.environ.get('SEARCH_CACHE_STALE_TTL', '3600'))
+        ),
+        article_cache=ArticleCache(
+            db_path=os.environ.get('ARTICLE_CACHE_DB', 'cache.db'),
+            max_bytes=int(os.environ.get('ARTICLE_CACHE_MAX_MB', '32')) * 1024 * 1024,
+            fresh_for=float(os.environ.get('ARTICLE_CACHE_FRESH_FOR', '300')),
+            touch_interval=float(os.environ.get('ARTICLE_CACHE_TOUCH_INTERVAL', '60'))
+        )
+    )
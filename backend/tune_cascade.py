@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+
+import numpy as np
+
+from bulk_score import detect_format, iter_records
+from classical_detector import ClassicalDetector
+
+FAKE_LABELS = {"1", "fake", "hoax", "false"}
+REAL_LABELS = {"0", "real", "true", "valid"}
+
+
+def parse_label(value):
+    value = str(value).strip().lower()
+    if value in FAKE_LABELS:
+        return 1
+    if value in REAL_LABELS:
+        return 0
+    return None
+
+
+def load_labeled(path, fmt, text_column, label_column, limit):
+    texts, labels = [], []
+    for _, label, text in iter_records(path, fmt, text_column, id_column=label_column):
+        label = parse_label(label)
+        if label is None or not text:
+            continue
+        texts.append(text)
+        labels.append(label)
+        if limit and len(texts) >= limit:
+            break
+    return texts, np.array(labels)
+
+
+def evaluate_band(low, high, classical_scores, unanimous, classical_pred, transformer_pred, labels):
+    # Same rule as CascadeDetector.is_decisive
+    decisive = unanimous & ~((classical_scores >= low) & (classical_scores <= high))
+    cascade_pred = np.where(decisive, classical_pred, transformer_pred)
+    return {
+        "band": (low, high),
+        "accuracy": float(np.mean(cascade_pred == labels)),
+        "saved": float(np.mean(decisive))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tune the cascade uncertainty band: accuracy against transformer calls saved"
+    )
+    parser.add_argument("input", help="Labeled CSV/JSONL (labels 1/0, fake/real, hoax/valid)")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--label-column", default="label")
+    parser.add_argument("--limit", type=int, default=0, help="Use at most this many labeled rows")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                        help="Largest accuracy loss against transformers alone that is acceptable")
+    parser.add_argument("--step", type=float, default=0.05)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    texts, labels = load_labeled(
+        args.input, args.format or detect_format(args.input), args.text_column, args.label_column, args.limit
+    )
+    if not texts:
+        raise SystemExit("No labeled rows found")
+    print(f"Loaded {len(texts)} labeled texts ({int(labels.sum())} fake)")
+
+    classical = ClassicalDetector().predict_batch(texts)
+    classical_scores = np.array([result["weighted_score"] for result in classical])
+    unanimous = np.array([result["unanimous"] for result in classical])
+    classical_pred = (classical_scores > 0.5).astype(int)
+
+    # Every text goes through the transformers once; each band is then just a mask
+    from huggingface_detector import MultiModelDetector
+    transformer = MultiModelDetector().predict_ensemble_batch(texts, batch_size=args.batch_size)
+    transformer_pred = np.array([1 if result["prediction"] == "FAKE" else 0 for result in transformer])
+
+    transformer_accuracy = float(np.mean(transformer_pred == labels))
+    print(f"Classical only:   accuracy {np.mean(classical_pred == labels):.4f}")
+    print(f"Transformer only: accuracy {transformer_accuracy:.4f}\n")
+
+    bounds = np.round(np.arange(0.0, 0.5 + 1e-9, args.step), 4)
+    candidates = [
+        evaluate_band(low, high, classical_scores, unanimous, classical_pred, transformer_pred, labels)
+        for low in bounds for high in np.round(1.0 - bounds, 4)
+    ]
+
+    print(f"{'band':>14}{'accuracy':>10}{'saved':>8}")
+    for candidate in sorted(candidates, key=lambda c: -c["saved"]):
+        low, high = candidate["band"]
+        # Only the symmetric bands; low and high were rounded separately
+        if np.isclose(low + high, 1.0):
+            print(f"{f'[{low:.2f}, {high:.2f}]':>14}{candidate['accuracy']:>10.4f}{candidate['saved']:>8.1%}")
+
+    acceptable = [c for c in candidates if c["accuracy"] >= transformer_accuracy - args.max_accuracy_drop]
+    if not acceptable:
+        print("\nNo band keeps accuracy within the allowed drop; leave the cascade disabled")
+        return
+
+    best = max(acceptable, key=lambda c: (c["saved"], c["accuracy"]))
+    low, high = best["band"]
+    print(f"\nBest band within {args.max_accuracy_drop:.2%} of transformer accuracy: "
+          f"CASCADE_BAND={low:g},{high:g} (accuracy {best['accuracy']:.4f}, "
+          f"{best['saved']:.1%} of transformer calls saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -228,10 +228,14 @@ function showDetailedResults(result) {
                     ${Object.entries(result.huggingface_details.individual_results || {}).map(([model, modelResult]) => `
                         <div class="model-result">
                             <strong>${model}:</strong> 
+                            ${modelResult.prediction === 'SKIPPED' ? `
+                            <span>skipped (early exit)</span>
+                            ` : `
                             <span class="${modelResult.prediction === 'REAL' ? 'text-success' : 'text-danger'}">
                                 ${modelResult.prediction}
                             </span>
                             (${(modelResult.confidence * 100).toFixed(1)}%)
+                            `}
                         </div>
                     `).join('')}
                 </div>
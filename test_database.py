@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import database
+from database import HistoryWriter, init_db
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+
+def history_count(db_path):
+    conn = sqlite3.connect(db_path)
+    count = conn.execute('SELECT COUNT(*) FROM analysis_history').fetchone()[0]
+    conn.close()
+    return count
+
+def test_history_writer_survives_bad_rows():
+    print("=== Testing HistoryWriter with a Row It Cannot Store ===")
+    db_path = os.path.join(tempfile.mkdtemp(), 'history.db')
+    init_db(db_path)
+    writer = HistoryWriter(db_path, max_wait=0.01, max_queue=4)
+
+    # object() is not JSON-serializable, so store_history raises TypeError
+    writer.add("Unserializable result", "FAKE", 0.9, {'detail': object()})
+    writer.flush()
+    assert writer.stats()['errors'] == 1
+
+    # More rows than max_queue: add() would block if the writer had died
+    for i in range(10):
+        writer.add(f"News text {i}", "REAL", 0.8, {'prediction': 'REAL'})
+    writer.flush()
+
+    stats = writer.stats()
+    print(f"Writer stats: {stats}")
+    assert stats['written'] == 10
+    assert history_count(db_path) == 10
+
+def test_history_writer_keeps_good_rows_of_a_failed_batch():
+    print("\n=== Testing HistoryWriter with a Bad Row Inside a Batch ===")
+    db_path = os.path.join(tempfile.mkdtemp(), 'history.db')
+    init_db(db_path)
+    # A long max_wait collects all rows into one group commit
+    writer = HistoryWriter(db_path, max_wait=0.5)
+
+    for i in range(5):
+        writer.add(f"News text {i}", "REAL", 0.8, {'prediction': 'REAL'})
+    writer.add("Unserializable result", "FAKE", 0.9, {'detail': object()})
+    for i in range(5, 10):
+        writer.add(f"News text {i}", "REAL", 0.8, {'prediction': 'REAL'})
+    writer.flush()
+
+    stats = writer.stats()
+    print(f"Writer stats: {stats}")
+    assert stats['errors'] == 1
+    assert stats['written'] == 10
+    assert history_count(db_path) == 10
+
+def test_history_writer_restarts_dead_thread():
+    print("\n=== Testing HistoryWriter Restart After Its Thread Dies ===")
+    db_path = os.path.join(tempfile.mkdtemp(), 'history.db')
+    init_db(db_path)
+    writer = HistoryWriter(db_path, max_wait=0.01)
+
+    original = database.store_history
+    def exit_thread(conn, rows):
+        # SystemExit is not an Exception, so it still ends the writer thread
+        database.store_history = original
+        raise SystemExit
+    database.store_history = exit_thread
+    try:
+        writer.add("Ends the writer", "FAKE", 0.9)
+        writer._worker.join(timeout=5)
+        assert not writer._worker.is_alive()
+    finally:
+        database.store_history = original
+
+    writer.add("Written by a new writer thread", "REAL", 0.7)
+    writer.flush()
+    assert writer._worker.is_alive()
+    assert history_count(db_path) == 1
+
+if __name__ == "__main__":
+    print("Testing the analysis history database")
+    print("=" * 60)
+
+    for test in (test_history_writer_survives_bad_rows, test_history_writer_restarts_dead_thread):
+        test()
+        print(f"✅ {test.__name__} passed")
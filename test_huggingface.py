@@ -36,6 +36,67 @@ def test_single_model():
     
     return True
 
+def test_batch_predict():
+    print("\n=== Testing Batched Inference ===")
+    try:
+        detector = HuggingFaceDetector("jy46604790/Fake-News-Bert-Detect")
+        
+        test_cases = [
+            "BREAKING: Scientists Discover Miracle Cure That Doctors Don't Want You to Know!",
+            "The Federal Reserve announced a 0.25% interest rate increase following today's meeting.",
+            "SHOCKING: This One Weird Trick Will Make You Rich Overnight!",
+            "Local authorities report a 15% decrease in traffic accidents after implementing new safety measures."
+        ]
+        
+        batch_results = detector.batch_predict(test_cases, batch_size=2)
+        for i, (text, batch_result) in enumerate(zip(test_cases, batch_results), 1):
+            single_result = detector.predict(text)
+            print(f"\nBatch {i}: {text[:50]}...")
+            print(f"Batched: {batch_result['prediction']} ({batch_result['confidence']:.3f}), "
+                  f"Single: {single_result['prediction']} ({single_result['confidence']:.3f})")
+            if batch_result['prediction'] != single_result['prediction']:
+                print("Batched prediction does not match single prediction")
+                return False
+            if abs(batch_result['confidence'] - single_result['confidence']) > 1e-3:
+                print("Batched confidence does not match single confidence")
+                return False
+                
+    except Exception as e:
+        print(f"Error testing batch predict: {str(e)}")
+        return False
+    
+    return True
+
+def test_long_document():
+    print("\n=== Testing Long-Document Sliding Windows ===")
+    try:
+        detector = HuggingFaceDetector(long_document=True, max_windows=4)
+        
+        paragraph = ("The Federal Reserve announced a 0.25% interest rate increase following today's meeting. "
+                     "Officials said further changes would depend on inflation data released next month. ")
+        long_text = paragraph * 60
+        
+        result = detector.predict(long_text)
+        print(f"Prediction: {result['prediction']} (confidence: {result['confidence']:.3f})")
+        print(f"Windows: {result['windows']['scored']} scored of {result['windows']['total']}")
+        
+        if result['windows']['scored'] > 4 or result['windows']['total'] < 2:
+            print("Unexpected number of windows")
+            return False
+        
+        # A short text fits in one window and should score like the plain path
+        short_result = detector.predict(paragraph)
+        plain_result = HuggingFaceDetector().predict(paragraph)
+        if short_result['prediction'] != plain_result['prediction']:
+            print("Single-window prediction does not match plain prediction")
+            return False
+                
+    except Exception as e:
+        print(f"Error testing long documents: {str(e)}")
+        return False
+    
+    return True
+
 def test_multi_model():
     print("\n=== Testing Multi-Model Ensemble ===")
     try:
@@ -63,6 +124,37 @@ def test_multi_model():
     
     return True
 
+def test_parallel_ensemble():
+    print("\n=== Testing Parallel Ensemble Execution ===")
+    try:
+        import time
+        sequential = MultiModelDetector()
+        parallel = MultiModelDetector(parallel=True)
+        
+        text = "Government Hiding Alien Technology in Area 51, Whistleblower Reveals!"
+        
+        start = time.perf_counter()
+        sequential_result = sequential.predict_ensemble(text)
+        sequential_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        parallel_result = parallel.predict_ensemble(text)
+        parallel_time = time.perf_counter() - start
+        
+        print(f"Sequential: {sequential_result['prediction']} in {sequential_time:.3f}s")
+        print(f"Parallel: {parallel_result['prediction']} in {parallel_time:.3f}s "
+              f"({parallel.threads_per_model} threads per model)")
+        
+        if sequential_result['prediction'] != parallel_result['prediction']:
+            print("Parallel prediction does not match sequential prediction")
+            return False
+                
+    except Exception as e:
+        print(f"Error testing parallel ensemble: {str(e)}")
+        return False
+    
+    return True
+
 def test_news_analyzer_integration():
     print("\n=== Testing NewsAnalyzer Integration (Hugging Face Only) ===")
     try:
@@ -100,12 +192,42 @@ def test_news_analyzer_integration():
     
     return True
 
+def test_batch_invalid_items():
+    print("\n=== Testing Batch Analysis with Invalid Items ===")
+    try:
+        from news_analyzer import NewsAnalyzer
+        
+        analyzer = NewsAnalyzer(lazy_models=True)
+        # Only the item handling is under test, so the models are not needed
+        analyzer.predict_models_batch = lambda texts: [
+            {"prediction": "REAL", "confidence": 0.9, "decision_tier": "transformer"} for _ in texts
+        ]
+        
+        texts = [1, "", None, ValueError("Invalid JSON line"), "The Federal Reserve announced a rate increase."]
+        results = {index: result for index, _, result, _ in analyzer.analyze_batch(texts)}
+        
+        for index, result in sorted(results.items()):
+            print(f"Item {index}: {result['prediction']} {result.get('error', '')}")
+        
+        if sorted(results) != list(range(len(texts))):
+            print("Not every item got a result")
+            return False
+        if [results[i]["prediction"] for i in range(4)] != ["ERROR"] * 4 or results[4]["prediction"] != "REAL":
+            print("Invalid items were not reported individually")
+            return False
+            
+    except Exception as e:
+        print(f"Error testing batch invalid items: {str(e)}")
+        return False
+    
+    return True
+
 if __name__ == "__main__":
     print("Testing Hugging Face Integration for Fake News Detection")
     print("=" * 60)
     
     success_count = 0
-    total_tests = 3
+    total_tests = 7
     
     if test_single_model():
         success_count += 1
@@ -113,18 +235,42 @@ if __name__ == "__main__":
     else:
         print("❌ Single model test failed")
     
+    if test_batch_predict():
+        success_count += 1
+        print("✅ Batch predict test passed")
+    else:
+        print("❌ Batch predict test failed")
+    
+    if test_long_document():
+        success_count += 1
+        print("✅ Long-document test passed")
+    else:
+        print("❌ Long-document test failed")
+    
     if test_multi_model():
         success_count += 1
         print("✅ Multi-model test passed")
     else:
         print("❌ Multi-model test failed")
     
+    if test_parallel_ensemble():
+        success_count += 1
+        print("✅ Parallel ensemble test passed")
+    else:
+        print("❌ Parallel ensemble test failed")
+    
     if test_news_analyzer_integration():
         success_count += 1
         print("✅ NewsAnalyzer integration test passed")
     else:
         print("❌ NewsAnalyzer integration test failed")
     
+    if test_batch_invalid_items():
+        success_count += 1
+        print("✅ Batch invalid items test passed")
+    else:
+        print("❌ Batch invalid items test failed")
+    
     print(f"\n=== Test Results: {success_count}/{total_tests} tests passed ===")
     
     if success_count == total_tests: